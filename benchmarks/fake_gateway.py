@@ -0,0 +1,279 @@
+"""Fake Windhager gateway, serving the lookup and datapoint APIs locally.
+
+The topology is a number of nodes, each with a heating circuit and a
+heater function. Every OID has a value, drifting a little each `step`, so
+that the benchmarks see realistic changes between polling cycles. Requests
+must carry a digest `Authorization` header with the current nonce, as with
+a real gateway.
+
+Changed values are also served by a change feed (`/api/1.0/events`): a
+request is held until a value changes after its `since` cursor, or for
+`feed_hold` seconds, and answers the changes with the cursor to resume from.
+
+Faults can be injected for the soak tests: nonce expiry, 401 storms, slow
+responses, connection resets and malformed JSON. The periodic ones follow a
+simulated clock, moved forward with `advance`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import zlib
+from collections import Counter, deque
+from dataclasses import dataclass
+
+from aiohttp import web
+
+# Function types of the topology, from const.py
+CLIMATE_FUNCTION_TYPE = 14
+HEATER_FUNCTION_TYPE = 9
+
+CHALLENGE = 'Digest realm="Windhager", nonce="{nonce}", qop="auth"{stale}'
+
+# Changes kept by the change feed, older cursors get every value again
+FEED_SIZE = 256
+
+
+@dataclass
+class Faults:
+    """Faults injected by the gateway.
+
+    Rates are per request, periods and durations in simulated seconds, and
+    0 disables a fault.
+    """
+
+    # A new nonce is issued after this time, the old one is refused
+    nonce_lifetime: float = 0
+    # Every request is refused for `storm_length` every `storm_every`
+    storm_every: float = 0
+    storm_length: float = 0
+    # Responses delayed by `slow_delay` (real) seconds
+    slow_rate: float = 0
+    slow_delay: float = 0
+    reset_rate: float = 0
+    malformed_rate: float = 0
+
+
+class FakeGateway:
+    """In-process fake gateway."""
+
+    def __init__(
+        self,
+        nodes: int = 2,
+        drift: float = 0.1,
+        seed: int = 0,
+        faults: Faults | None = None,
+        feed_hold: float = 10,
+    ) -> None:
+        self.nodes = [
+            {
+                "nodeId": 60 + index,
+                "functions": [
+                    {
+                        "fctId": 0,
+                        "fctType": CLIMATE_FUNCTION_TYPE,
+                        "lock": False,
+                        "name": f"Circuit {index + 1}",
+                    },
+                    {
+                        "fctId": 1,
+                        "fctType": HEATER_FUNCTION_TYPE,
+                        "lock": False,
+                        "name": "BioWIN",
+                    },
+                ],
+            }
+            for index in range(nodes)
+        ]
+        # Share of the values changing at each step
+        self.drift = drift
+        self.values: dict[str, str] = {}
+        self.requests = 0
+        self.faults = faults or Faults()
+        # Faults injected, by kind
+        self.injected: Counter[str] = Counter()
+        self.clock = 0.0
+        # Change feed: the changes numbered up to `_feed_end`, and the event
+        # waking the held requests
+        self.feed_hold = feed_hold
+        self._feed: deque[tuple[str, str]] = deque(maxlen=FEED_SIZE)
+        self._feed_end = 0
+        self._feed_changed: asyncio.Event | None = None
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+        self.host: str | None = None
+
+    def value(self, oid: str) -> str:
+        """Return the value of an OID, deterministic until it drifts."""
+        if oid not in self.values:
+            if oid.endswith("/2/1/0"):
+                # Heater status: modulating
+                self.values[oid] = "8"
+            else:
+                self.values[oid] = f"{zlib.crc32(oid.encode()) % 400 / 10:.1f}"
+        return self.values[oid]
+
+    @property
+    def nonce(self) -> str:
+        """Return the nonce currently accepted."""
+        lifetime = self.faults.nonce_lifetime
+        return f"{int(self.clock // lifetime) if lifetime else 0:08x}"
+
+    @property
+    def storm(self) -> bool:
+        """Return whether a 401 storm is raging."""
+        faults = self.faults
+        return bool(faults.storm_every) and (
+            self.clock % faults.storm_every < faults.storm_length
+        )
+
+    def advance(self, seconds: float) -> None:
+        """Move the simulated clock forward."""
+        self.clock += seconds
+
+    def set(self, oid: str, value: str) -> None:
+        """Change the value of an OID, and publish it on the change feed."""
+        if self.values.get(oid) == value:
+            return
+        self.values[oid] = value
+        self._feed.append((oid, value))
+        self._feed_end += 1
+        if self._feed_changed is not None:
+            self._feed_changed.set()
+            self._feed_changed = None
+
+    def changes(self, since: int) -> list[dict]:
+        """Return the last value of each OID changed after a feed cursor."""
+        start = self._feed_end - len(self._feed)
+        if since < start:
+            changed = dict(self.values)
+        else:
+            changed = dict(list(self._feed)[since - start :])
+        return [{"OID": oid, "value": value} for oid, value in changed.items()]
+
+    def step(self) -> None:
+        """Make a share of the known values drift."""
+        for oid in list(self.values):
+            if self._random.random() < self.drift:
+                value = float(self.values[oid]) + self._random.choice((-0.5, 0.5))
+                self.set(oid, f"{value:.1f}")
+
+    def _authorized(self, request: web.Request) -> bool:
+        header = request.headers.get("Authorization", "")
+        if not header.startswith("Digest "):
+            return False
+        if f'nonce="{self.nonce}"' not in header:
+            self.injected["expired_nonce"] += 1
+            return False
+        if self.storm:
+            self.injected["storm_401"] += 1
+            return False
+        return True
+
+    def _challenge(self, request: web.Request) -> web.Response:
+        stale = ", stale=true" if "Authorization" in request.headers else ""
+        return web.Response(
+            status=401,
+            headers={
+                "WWW-Authenticate": CHALLENGE.format(nonce=self.nonce, stale=stale)
+            },
+        )
+
+    @web.middleware
+    async def _inject_faults(self, request: web.Request, handler) -> web.Response:
+        faults = self.faults
+        if faults.slow_rate and self._random.random() < faults.slow_rate:
+            self.injected["slow"] += 1
+            await asyncio.sleep(faults.slow_delay)
+        if faults.reset_rate and self._random.random() < faults.reset_rate:
+            self.injected["reset"] += 1
+            request.transport.abort()
+            raise asyncio.CancelledError
+        response = await handler(request)
+        if (
+            response.status == 200
+            and faults.malformed_rate
+            and self._random.random() < faults.malformed_rate
+        ):
+            self.injected["malformed"] += 1
+            body = response.body[: len(response.body) // 2]
+            return web.Response(body=body, content_type="application/json")
+        return response
+
+    async def lookup(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            return self._challenge(request)
+        self.requests += 1
+        parts = request.match_info["path"].strip("/").split("/")
+        path = "/" + "/".join(parts)
+        if len(parts) == 1:
+            return web.json_response(self.nodes)
+        if len(parts) == 2:
+            node = next((n for n in self.nodes if str(n["nodeId"]) == parts[1]), None)
+            if node is None:
+                raise web.HTTPNotFound()
+            return web.json_response(node)
+        if len(parts) == 3:
+            return web.json_response([0, 1])
+        if len(parts) == 4:
+            return web.json_response(
+                [
+                    {
+                        "OID": f"{path}/{index}/0",
+                        "value": self.value(f"{path}/{index}/0"),
+                    }
+                    for index in range(3)
+                ]
+            )
+        return web.json_response({"OID": path, "value": self.value(path)})
+
+    async def datapoint(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            return self._challenge(request)
+        self.requests += 1
+        body = json.loads(await request.read())
+        self.set(body["OID"], str(body["value"]))
+        return web.json_response({"status": "ok"})
+
+    async def events(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            return self._challenge(request)
+        self.requests += 1
+        since = int(request.query.get("since", self._feed_end))
+        if since >= self._feed_end:
+            if self._feed_changed is None:
+                self._feed_changed = asyncio.Event()
+            try:
+                async with asyncio.timeout(self.feed_hold):
+                    await self._feed_changed.wait()
+            except TimeoutError:
+                pass
+        return web.json_response(
+            {"values": self.changes(since), "cursor": self._feed_end}
+        )
+
+    def application(self) -> web.Application:
+        """Return the web application of the gateway."""
+        app = web.Application(middlewares=[self._inject_faults])
+        app.router.add_get("/api/1.0/lookup/{path:.*}", self.lookup)
+        app.router.add_put("/api/1.0/datapoint", self.datapoint)
+        app.router.add_get("/api/1.0/events", self.events)
+        return app
+
+    async def start(self, port: int = 0) -> str:
+        """Listen on the loopback interface and return the host to poll."""
+        self._runner = web.AppRunner(self.application())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.host = f"127.0.0.1:{port}"
+        return self.host
+
+    async def stop(self) -> None:
+        """Stop listening."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,102 @@
+"""Measure the memory used by the polling snapshots.
+
+The real client polls a local fake gateway whose values drift between
+cycles. Like the coordinators, the benchmark keeps the last snapshots
+around (the current data, and the previous ones diffed against), and
+reports the memory allocated by each cycle and the memory retained by the
+snapshots kept. `--no-evolve` keeps every fetched snapshot as is, instead
+of keeping the previous one when no value changed (`Snapshot.evolve`).
+
+    python benchmarks/memory.py --cycles 200 --nodes 4 --drift 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import os
+import statistics
+import sys
+import tracemalloc
+from collections import deque
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, os.path.join(ROOT, "custom_components"))
+
+from fake_gateway import FakeGateway  # noqa: E402
+from windhager.client import WindhagerHttpClient  # noqa: E402
+
+
+def retained_size(snapshots) -> tuple[int, int]:
+    """Return the size and count of the distinct objects holding the values."""
+    seen: set[int] = set()
+    size = 0
+    for snapshot in snapshots:
+        # The dict behind the read-only mapping
+        containers = gc.get_referents(snapshot.values) + [snapshot]
+        objects = containers + [o for item in snapshot.values.items() for o in item]
+        for obj in objects:
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                size += sys.getsizeof(obj)
+    return size, len(seen)
+
+
+async def run(args: argparse.Namespace) -> None:
+    gateway = FakeGateway(nodes=args.nodes, drift=args.drift)
+    host = await gateway.start()
+    client = WindhagerHttpClient(host, "secret")
+    try:
+        await client.discover()
+        kept = deque([await client.fetch_all()], maxlen=args.keep)
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        peaks = []
+        for _ in range(args.cycles):
+            gateway.step()
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+            snapshot = await client.fetch_all()
+            if not args.no_evolve:
+                snapshot = kept[-1].evolve(snapshot.values)
+            kept.append(snapshot)
+            peaks.append(tracemalloc.get_traced_memory()[1] - start)
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+
+        size, objects = retained_size(kept)
+        print(
+            f"{args.cycles} cycles of {len(kept[-1].values)} OIDs, "
+            f"{args.nodes} nodes, {args.drift:.0%} drift, "
+            f"{'fetched snapshots' if args.no_evolve else 'evolved snapshots'}"
+        )
+        print(
+            f"Allocated per cycle: mean {statistics.mean(peaks) / 1024:.1f} KiB, "
+            f"max {max(peaks) / 1024:.1f} KiB"
+        )
+        print(
+            f"Last {len(kept)} snapshots: {size / 1024:.1f} KiB "
+            f"in {objects} distinct objects"
+        )
+        print(f"Memory retained after the cycles: {retained / 1024:.1f} KiB")
+    finally:
+        await client.close()
+        await gateway.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--cycles", type=int, default=100)
+    parser.add_argument("--nodes", type=int, default=2)
+    parser.add_argument("--drift", type=float, default=0.1)
+    parser.add_argument("--keep", type=int, default=10, help="snapshots kept")
+    parser.add_argument("--no-evolve", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
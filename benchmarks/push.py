@@ -0,0 +1,147 @@
+"""Check the change feed against a local fake gateway.
+
+The real client polls the fake gateway (`fake_gateway.py`) once, then its
+push listener follows the gateway's change feed while the values drift
+every `--step` seconds. The feed holds each request until a value changes,
+like a gateway pushing its changes.
+
+The run fails (exit status 1) if the listener does not connect, if the
+poll interval does not switch to the sweep interval while it is connected,
+or if a changed value is not pushed within `--max-latency` seconds.
+
+    python benchmarks/push.py --changes 10 --step 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, os.path.join(ROOT, "custom_components"))
+
+from fake_gateway import FakeGateway  # noqa: E402
+from windhager.client import WindhagerHttpClient  # noqa: E402
+from windhager.const import FEED_MIN_INTERVAL  # noqa: E402
+from windhager.listener import WindhagerPushListener  # noqa: E402
+
+
+async def run(args: argparse.Namespace) -> list[str]:
+    """Follow the change feed, and return the failed checks."""
+    failures = []
+    gateway = FakeGateway(
+        nodes=args.nodes, drift=args.drift, seed=args.seed, feed_hold=args.hold
+    )
+    host = await gateway.start()
+    client = WindhagerHttpClient(host, "secret")
+    interval = timedelta(seconds=args.interval)
+    sweep_interval = timedelta(seconds=args.sweep_interval)
+
+    # Changes not pushed yet: value, and time of the first change unseen
+    pending: dict[str, tuple[str, float]] = {}
+    latencies = []
+    pushed = 0
+    states = []
+
+    def on_values(values: dict) -> None:
+        nonlocal pushed
+        now = time.monotonic()
+        pushed += len(values)
+        for oid, value in values.items():
+            change = pending.get(oid)
+            if change is not None and change[0] == value:
+                latencies.append(now - change[1])
+                del pending[oid]
+
+    def on_state(connected: bool) -> None:
+        states.append(connected)
+        expected = sweep_interval if connected else interval
+        if listener.poll_interval(interval, sweep_interval) != expected:
+            failures.append(
+                f"poll interval is not {expected} while "
+                + ("connected" if connected else "disconnected")
+            )
+
+    listener = WindhagerPushListener(client, "/events", on_values, on_state)
+    try:
+        await client.discover()
+        await client.fetch_all()
+        task = asyncio.create_task(listener.run())
+        for _ in range(args.changes):
+            await asyncio.sleep(args.step)
+            before = dict(gateway.values)
+            gateway.step()
+            now = time.monotonic()
+            for oid, value in gateway.values.items():
+                if before.get(oid) != value:
+                    pending[oid] = (value, pending.get(oid, (None, now))[1])
+
+        # Let the last changes come through
+        deadline = time.monotonic() + args.max_latency
+        while pending and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        connected = listener.connected
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    finally:
+        await client.close()
+        await gateway.stop()
+
+    if not connected:
+        failures.append(f"listener not connected (states {states})")
+    if pending:
+        failures.append(f"{len(pending)} changes not pushed")
+    slowest = max(latencies, default=0)
+    if slowest > args.max_latency:
+        failures.append(
+            f"a change took {slowest:.2f} s to be pushed, limit {args.max_latency} s"
+        )
+
+    print(
+        f"{args.changes} steps every {args.step:g} s, {len(gateway.values)} OIDs, "
+        f"{args.drift:.0%} drift"
+    )
+    print(f"Listener states: {states}, {gateway.requests} gateway requests")
+    print(f"Changes pushed: {len(latencies)}, values pushed: {pushed}")
+    if latencies:
+        print(
+            "Latency: median %.2f s, max %.2f s"
+            % (statistics.median(latencies), slowest)
+        )
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--changes", type=int, default=10, help="drift steps")
+    parser.add_argument("--step", type=float, default=2, help="seconds")
+    parser.add_argument("--nodes", type=int, default=2)
+    parser.add_argument("--drift", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hold", type=float, default=10, help="feed hold time")
+    parser.add_argument("--interval", type=float, default=60, help="poll interval")
+    parser.add_argument("--sweep-interval", type=float, default=900)
+    parser.add_argument(
+        "--max-latency", type=float, default=FEED_MIN_INTERVAL + 1, help="seconds"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.CRITICAL)
+
+    failures = asyncio.run(run(args))
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
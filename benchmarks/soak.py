@@ -0,0 +1,290 @@
+"""Soak test of the polling engine against a faulty fake gateway.
+
+The real client polls a local fake gateway (`fake_gateway.py`) injecting
+nonce expiry, 401 storms, slow responses, connection resets and malformed
+JSON, for hours of simulated time: cycles run back to back, and the
+gateway's clock moves forward by the poll interval after each of them.
+Cycles are bounded like in the coordinator (`asyncio.timeout` around
+`fetch_all` with the same deadline), and a write is made every simulated
+hour. With `--export`, every snapshot is also exported to a local HTTP
+sink, refusing batches at the reset rate.
+
+The run fails (exit status 1) if a cycle outlives its timeout, if memory
+keeps growing after the first simulated hour, if requests hold scheduler
+slots between cycles, if the client opens more than one session or leaves
+one open, if tasks are left behind, if the client does not recover once
+the faults stop, or if exported samples are neither received nor counted
+as dropped.
+
+    python benchmarks/soak.py --hours 24 --interval 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+import aiohttp
+from aiohttp import web
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, os.path.join(ROOT, "custom_components"))
+
+from fake_gateway import FakeGateway, Faults  # noqa: E402
+from windhager.client import WindhagerHttpClient  # noqa: E402
+from windhager.exporter import WindhagerExporter  # noqa: E402
+
+
+class ExportSink:
+    """Local HTTP endpoint counting the exported samples it receives."""
+
+    def __init__(self, failure_rate: float, seed: int) -> None:
+        self.failure_rate = failure_rate
+        self.received = 0
+        self.refused = 0
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+
+    async def write(self, request: web.Request) -> web.Response:
+        body = await request.text()
+        if self._random.random() < self.failure_rate:
+            self.refused += 1
+            raise web.HTTPServiceUnavailable()
+        self.received += body.count("\n")
+        return web.Response(status=204)
+
+    async def start(self) -> str:
+        """Listen on the loopback interface and return the URL to POST to."""
+        app = web.Application()
+        app.router.add_post("/write", self.write)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/write"
+
+    async def stop(self) -> None:
+        """Stop listening."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def open_sessions(*excluded: aiohttp.ClientSession) -> int:
+    """Return the number of aiohttp sessions not closed yet, but the excluded."""
+    gc.collect()
+    return sum(
+        1
+        for obj in gc.get_objects()
+        if isinstance(obj, aiohttp.ClientSession)
+        and not obj.closed
+        and not any(obj is session for session in excluded)
+    )
+
+
+async def soak(args: argparse.Namespace) -> list[str]:
+    """Run the soak test, and return the failed checks."""
+    failures = []
+    faults = Faults(
+        nonce_lifetime=args.nonce_lifetime,
+        storm_every=args.storm_every,
+        storm_length=args.storm_length,
+        slow_rate=args.slow_rate,
+        slow_delay=args.slow_delay,
+        reset_rate=args.reset_rate,
+        malformed_rate=args.malformed_rate,
+    )
+    gateway = FakeGateway(nodes=args.nodes, faults=faults, seed=args.seed)
+    host = await gateway.start()
+    sink = exporter = None
+    # The exporter's session, shared with the rest of Home Assistant in the
+    # integration, is not the client's: it is left out of the session checks
+    export_session = None
+    if args.export:
+        sink = ExportSink(args.reset_rate, args.seed)
+        export_session = aiohttp.ClientSession()
+        exporter = WindhagerExporter(
+            await sink.start(),
+            "line",
+            "snapshot",
+            session=export_session,
+            max_buffer=args.export_buffer,
+        )
+    exported = 0
+    tasks_before = len(asyncio.all_tasks())
+    client = WindhagerHttpClient(host, "secret", request_timeout=args.request_timeout)
+
+    tracemalloc.start()
+    memory = []
+    durations = []
+    outcomes: Counter[str] = Counter()
+    writes: Counter[str] = Counter()
+    cycles_per_hour = max(1, round(3600 / args.interval))
+    cycles = round(args.hours * cycles_per_hour)
+    try:
+        # Discovery is retried like a config entry that is not ready yet
+        while True:
+            try:
+                await client.discover()
+                break
+            except Exception:
+                outcomes["discovery_retry"] += 1
+                gateway.advance(args.interval)
+        oids = sorted(client.oids)
+
+        for cycle in range(cycles):
+            gateway.step()
+            start = time.monotonic()
+            try:
+                async with asyncio.timeout(args.cycle_timeout):
+                    snapshot = await client.fetch_all(
+                        deadline=start + args.cycle_timeout
+                    )
+                missing = sum(1 for oid in oids if snapshot.values.get(oid) is None)
+                outcomes["partial" if missing else "complete"] += 1
+                if exporter is not None:
+                    exporter.enqueue(snapshot.values)
+                    exporter.schedule_flush()
+                    exported += sum(
+                        1 for v in snapshot.values.values() if v is not None
+                    )
+            except TimeoutError:
+                outcomes["timeout"] += 1
+            except Exception as err:
+                outcomes[type(err).__name__] += 1
+            durations.append(time.monotonic() - start)
+
+            if client.scheduler.active or client.scheduler.waiting:
+                failures.append(
+                    f"cycle {cycle}: {client.scheduler.active} slots held, "
+                    f"{client.scheduler.waiting} requests waiting"
+                )
+
+            gateway.advance(args.interval)
+            if (cycle + 1) % cycles_per_hour == 0:
+                result = await client.update(oids[0], "1", timeout=args.cycle_timeout)
+                writes["verified" if result.verified else "failed"] += 1
+                gc.collect()
+                memory.append(tracemalloc.get_traced_memory()[0])
+                if open_sessions(export_session) > 1:
+                    failures.append(f"hour {len(memory)}: more than one session")
+
+        # Once the faults stop, a cycle must read every OID again
+        gateway.faults = Faults()
+        snapshot = await client.fetch_all()
+        missing = [oid for oid in oids if snapshot.values.get(oid) is None]
+        if missing:
+            failures.append(f"{len(missing)} OIDs not read after the faults stopped")
+        if client.quarantine:
+            failures.append(f"{len(client.quarantine)} OIDs still quarantined")
+        if exporter is not None:
+            await exporter.close()
+            if sink.received + exporter.dropped != exported:
+                failures.append(
+                    f"{exported} samples exported, {sink.received} received "
+                    f"and {exporter.dropped} dropped"
+                )
+    finally:
+        await client.close()
+        await gateway.stop()
+        if export_session is not None:
+            await export_session.close()
+        if sink is not None:
+            await sink.stop()
+        tracemalloc.stop()
+
+    # Let the closed connections and the server handlers wind down
+    await asyncio.sleep(0.1)
+    if open_sessions():
+        failures.append("session left open")
+    leaked = len(asyncio.all_tasks()) - tasks_before
+    if leaked > 0:
+        failures.append(f"{leaked} tasks left behind")
+
+    slowest = max(durations, default=0)
+    if slowest > args.cycle_timeout + args.slack:
+        failures.append(
+            f"cycle lasted {slowest:.2f} s, timeout is {args.cycle_timeout} s"
+        )
+    if len(memory) > 1:
+        growth = (memory[-1] - memory[0]) / 1024
+        if growth > args.max_growth:
+            failures.append(
+                f"memory grew by {growth:.0f} KiB after the first hour "
+                f"(limit {args.max_growth} KiB)"
+            )
+    else:
+        growth = 0.0
+
+    print(
+        f"{args.hours:g} simulated hours, {cycles} cycles of {len(oids)} OIDs "
+        f"every {args.interval:g} s"
+    )
+    print("Faults injected: " + _counts(gateway.injected))
+    print("Cycles: " + _counts(outcomes))
+    print("Writes: " + _counts(writes))
+    if durations:
+        durations.sort()
+        print(
+            "Cycle time: median %.3f s, p95 %.3f s, max %.3f s"
+            % (
+                statistics.median(durations),
+                durations[int(0.95 * (len(durations) - 1))],
+                durations[-1],
+            )
+        )
+    print(f"Memory growth after the first hour: {growth:.1f} KiB")
+    print(f"Client metrics: {client.metrics}")
+    if exporter is not None:
+        print(
+            f"Export: {exported} samples, {sink.received} received, "
+            f"{exporter.dropped} dropped, {sink.refused} batches refused"
+        )
+    return failures
+
+
+def _counts(counter: Counter) -> str:
+    return ", ".join(f"{k} {v}" for k, v in sorted(counter.items())) or "none"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--hours", type=float, default=6)
+    parser.add_argument("--interval", type=float, default=60, help="poll interval")
+    parser.add_argument("--nodes", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cycle-timeout", type=float, default=5)
+    parser.add_argument("--request-timeout", type=float, default=1)
+    parser.add_argument("--slack", type=float, default=0.5, help="cycle time margin")
+    parser.add_argument("--max-growth", type=float, default=512, help="KiB")
+    parser.add_argument("--nonce-lifetime", type=float, default=600)
+    parser.add_argument("--storm-every", type=float, default=3600)
+    parser.add_argument("--storm-length", type=float, default=180)
+    parser.add_argument("--slow-rate", type=float, default=0.01)
+    parser.add_argument("--slow-delay", type=float, default=1.5)
+    parser.add_argument("--reset-rate", type=float, default=0.01)
+    parser.add_argument("--malformed-rate", type=float, default=0.01)
+    parser.add_argument("--export", action="store_true", help="export to a sink")
+    parser.add_argument("--export-buffer", type=int, default=10000, help="samples")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.CRITICAL)
+
+    failures = asyncio.run(soak(args))
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Measure the import time of the integration's modules.
+
+Every module is imported in a fresh interpreter, several times, and the
+median import time is reported along with the integration modules and the
+number of third-party modules it pulled in. Modules that need a missing
+dependency (e.g. Home Assistant) are reported as skipped.
+
+    python benchmarks/startup.py --runs 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+CUSTOM_COMPONENTS = os.path.join(ROOT, "custom_components")
+
+MODULES = (
+    "windhager",
+    "windhager.const",
+    "windhager.client",
+    "windhager.coordinator",
+    "windhager.gateway",
+    "windhager.config_flow",
+    "windhager.services",
+    "windhager.climate",
+    "windhager.sensor",
+)
+
+PROBE = """
+import json, sys, time
+before = set(sys.modules)
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = set(sys.modules) - before
+print(json.dumps({{
+    "elapsed": elapsed,
+    "own": sorted(m for m in loaded if m.startswith("windhager")),
+    "external": len({{m.split(".")[0] for m in loaded if not m.startswith("windhager")}}),
+}}))
+"""
+
+
+def measure(module: str, runs: int) -> dict | None:
+    """Import a module in fresh interpreters and return the median result."""
+    results = []
+    for _ in range(runs):
+        process = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            cwd=CUSTOM_COMPONENTS,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if process.returncode:
+            return None
+        results.append(json.loads(process.stdout))
+    result = results[-1]
+    result["elapsed"] = statistics.median(r["elapsed"] for r in results)
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        result = measure(module, args.runs)
+        if result is None:
+            print(f"{module:24} skipped (missing dependency)")
+            continue
+        own = ", ".join(m.removeprefix("windhager.") for m in result["own"][1:])
+        print(
+            f"{module:24} {result['elapsed'] * 1000:7.1f} ms"
+            f"  {result['external']:3} packages  loads: {own or '-'}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,98 +1,138 @@
-"""The Windhager Heater integration."""
+"""The Windhager Heater integration.
+
+Home Assistant is only imported by the entry points below, so that the
+client can also be used as a library or from the command line
+(`python -m windhager`) without Home Assistant installed.
+"""
 
 from __future__ import annotations
 
-import asyncio
 import logging
-from datetime import timedelta
+from typing import TYPE_CHECKING
 
-import async_timeout
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import (
-    DataUpdateCoordinator,
-    UpdateFailed,
-)
+from .const import DATA_VALIDATED_CLIENTS, DOMAIN
 
-from .client import WindhagerHttpClient
-from .const import DOMAIN, UPDATE_INTERVAL
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[Platform] = [Platform.CLIMATE, Platform.SENSOR]
+PLATFORMS: list[str] = ["climate", "sensor"]
 
 
-class WindhagerDataUpdateCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching Windhager data."""
+def __getattr__(name: str):
+    """Build the Home Assistant config schema on first access."""
+    if name == "CONFIG_SCHEMA":
+        import homeassistant.helpers.config_validation as cv
 
-    def __init__(self, hass, client, entry):
-        """Initialize the coordinator."""
-        super().__init__(
-            hass,
-            _LOGGER,
-            name=DOMAIN,
-            update_interval=timedelta(seconds=UPDATE_INTERVAL),
-        )
-        self.client = client
-        self.entry = entry
-        self.consecutive_timeouts = 0
-
-    async def _async_update_data(self):
-        """Fetch data from API endpoint."""
-        try:
-            _LOGGER.debug("Starting data update from Windhager device")
-            async with async_timeout.timeout(20):
-                data = await self.client.fetch_all()
-                self.consecutive_timeouts = 0
-                return data
-        except asyncio.TimeoutError as err:
-            self.consecutive_timeouts += 1
-            _LOGGER.warning(
-                "Timeout fetching data from %s after 20 seconds (attempt %d)",
-                self.entry.data["host"],
-                self.consecutive_timeouts,
-            )
-            if self.consecutive_timeouts >= 3:
-                raise UpdateFailed(
-                    f"Multiple consecutive timeouts communicating with API: {err}"
-                ) from err
-            # Return last known good data if available
-            return self.data if self.data else None
-        except Exception as err:
-            _LOGGER.error(
-                "Error fetching data from %s: %s", self.entry.data["host"], str(err)
-            )
-            raise UpdateFailed(f"Error communicating with API: {err}") from err
+        return cv.config_entry_only_config_schema(DOMAIN)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def async_setup(hass: HomeAssistant, config: dict) -> bool:
+    """Set up the Windhager services."""
+    from .services import async_setup_services
+
+    await async_setup_services(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up windhager integration from a config entry."""
+    from .client import WindhagerHttpClient
+    from .gateway import WindhagerGateway
+
     _LOGGER.info("Setting up Windhager integration for %s", entry.data["host"])
 
     hass.data.setdefault(DOMAIN, {})
 
-    client = WindhagerHttpClient(
-        host=entry.data["host"],
-        password=entry.data["password"],
-    )
+    # Reuse the connection validated by the config flow, if any
+    client = hass.data.get(DATA_VALIDATED_CLIENTS, {}).pop(entry.data["host"], None)
+    if client is None or client.password != entry.data["password"]:
+        if client is not None:
+            await client.close()
+        client = WindhagerHttpClient(
+            host=entry.data["host"],
+            password=entry.data["password"],
+        )
 
-    coordinator = WindhagerDataUpdateCoordinator(hass, client, entry)
-    await coordinator.async_config_entry_first_refresh()
+    gateway = WindhagerGateway(hass, client, entry)
+    try:
+        await gateway.async_setup()
+    except Exception:
+        await gateway.async_close()
+        raise
 
-    hass.data[DOMAIN][entry.entry_id] = coordinator
+    hass.data[DOMAIN][entry.entry_id] = gateway
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
 
     return True
 
 
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate a config entry, and its registry entries, to the current version."""
+    if entry.version > 2:
+        # Downgraded from a future version
+        return False
+
+    if entry.version == 1:
+        _async_merge_legacy_devices(hass, entry)
+        hass.config_entries.async_update_entry(entry, version=2)
+        _LOGGER.info("Migrated Windhager entry %s to version 2", entry.data["host"])
+
+    return True
+
+
+def _async_merge_legacy_devices(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Move the sensors of each node to the device of the node's climate.
+
+    Sensors and climates of a node used to be on two devices with different
+    IDs. The sensor device is renamed to the current ID, or merged into the
+    climate device when there is one.
+    """
+    from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+    from .ids import IdFactory
+
+    ids = IdFactory(entry.data["host"])
+    device_registry = dr.async_get(hass)
+    entity_registry = er.async_get(hass)
+    for device in dr.async_entries_for_config_entry(device_registry, entry.entry_id):
+        node = next(
+            (
+                node
+                for domain, identifier in device.identifiers
+                if domain == DOMAIN and (node := ids.legacy_node(identifier))
+            ),
+            None,
+        )
+        if node is None:
+            continue
+
+        identifier = (DOMAIN, ids.device_id(node))
+        target = device_registry.async_get_device(identifiers={identifier})
+        if target is None:
+            device_registry.async_update_device(device.id, new_identifiers={identifier})
+            continue
+        for entity in er.async_entries_for_device(
+            entity_registry, device.id, include_disabled_entities=True
+        ):
+            entity_registry.async_update_entity(entity.entity_id, device_id=target.id)
+        device_registry.async_remove_device(device.id)
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options without reloading the entry."""
+    hass.data[DOMAIN][entry.entry_id].async_apply_options()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.info("Unloading Windhager integration for %s", entry.data["host"])
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        coordinator = hass.data[DOMAIN][entry.entry_id]
-        await coordinator.client.close()
-        hass.data[DOMAIN].pop(entry.entry_id)
+        await hass.data[DOMAIN].pop(entry.entry_id).async_close()
 
     return unload_ok
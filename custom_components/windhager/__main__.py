@@ -0,0 +1,196 @@
+"""Command line interface of the Windhager client.
+
+Runs the same client and polling engine as the integration, without Home
+Assistant. From the `custom_components` directory:
+
+    python -m windhager poll 192.168.1.5 --password secret
+    python -m windhager dump 192.168.1.5 --path /1/60 --output dump.json
+    python -m windhager watch 192.168.1.5
+    python -m windhager watch 192.168.1.5 --push /events
+    python -m windhager benchmark 192.168.1.5 --cycles 20 --concurrency 4 --trace
+
+The password can also be given with the WINDHAGER_PASSWORD environment
+variable.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+from .client import WindhagerHttpClient
+from .const import DEFAULT_MAX_CONCURRENCY, DEFAULT_REQUEST_TIMEOUT, UPDATE_INTERVAL
+from .listener import WindhagerPushListener
+
+
+def _print_values(values: dict, only: dict | None = None) -> None:
+    for oid in sorted(values):
+        if only is None or only.get(oid, object()) != values[oid]:
+            print(f"{oid}\t{values[oid]}")
+
+
+async def poll(client: WindhagerHttpClient, args: argparse.Namespace) -> None:
+    """Poll every exposed OID, a given number of times."""
+    for cycle in range(args.count):
+        if cycle:
+            await asyncio.sleep(args.interval)
+        snapshot = await client.fetch_all()
+        if args.json:
+            print(json.dumps(dict(snapshot.values), indent=2, ensure_ascii=False))
+        else:
+            _print_values(snapshot.values)
+
+
+async def dump(client: WindhagerHttpClient, args: argparse.Namespace) -> None:
+    """Read every datapoint below a lookup path."""
+    snapshot = await client.walk(args.path)
+    text = json.dumps(snapshot, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+        print(f"Saved {len(snapshot['values'])} values to {args.output}")
+    else:
+        print(text)
+
+
+async def watch(client: WindhagerHttpClient, args: argparse.Namespace) -> None:
+    """Poll (or follow the change feed) forever and print the changed values."""
+    if args.push:
+        listener = WindhagerPushListener(
+            client,
+            args.push,
+            on_values=_print_values,
+            on_state=lambda connected: print(
+                "Connected" if connected else "Disconnected", file=sys.stderr
+            ),
+        )
+        await listener.run()
+        if listener.supported is False:
+            print(f"No change feed at {args.push}, polling", file=sys.stderr)
+
+    previous = None
+    while True:
+        snapshot = await client.fetch_all()
+        if previous is not None and snapshot.values != previous:
+            print(time.strftime("%H:%M:%S"))
+        _print_values(snapshot.values, previous)
+        previous = snapshot.values
+        await asyncio.sleep(args.interval)
+
+
+async def benchmark(client: WindhagerHttpClient, args: argparse.Namespace) -> None:
+    """Measure the duration of full polling cycles."""
+    client.tracer.enable(args.trace)
+    start = time.perf_counter()
+    await client.discover()
+    print(f"Discovery: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    durations = []
+    loop_times = []
+    for _ in range(args.cycles):
+        start = time.perf_counter()
+        snapshot = await client.fetch_all()
+        durations.append(time.perf_counter() - start)
+        loop_times.append(client.metrics["cycle_loop_time"])
+
+    oids = len(snapshot.values)
+    durations.sort()
+    print(f"{args.cycles} cycles of {oids} OIDs, concurrency {args.concurrency}")
+    print(
+        "Cycle: min %.1f ms, mean %.1f ms, p95 %.1f ms, max %.1f ms"
+        % (
+            durations[0] * 1000,
+            statistics.mean(durations) * 1000,
+            durations[int(0.95 * (len(durations) - 1))] * 1000,
+            durations[-1] * 1000,
+        )
+    )
+    print(f"Throughput: {oids * args.cycles / sum(durations):.1f} requests/s")
+    print(
+        f"Event loop: mean {statistics.mean(loop_times):.3f} ms, "
+        f"max {max(loop_times):.3f} ms per cycle"
+    )
+    for kind, spans in client.tracer.summary().items():
+        print(
+            f"{kind.capitalize()} phases: "
+            + ", ".join(
+                f"{span} {stats['mean']:.2f} ms (max {stats['max']:.2f})"
+                for span, stats in spans.items()
+            )
+        )
+
+
+COMMANDS = {"poll": poll, "dump": dump, "watch": watch, "benchmark": benchmark}
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="windhager", description=__doc__.split("\n")[0]
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="debug logging")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_command(name: str, help: str) -> argparse.ArgumentParser:
+        command = commands.add_parser(name, help=help)
+        command.add_argument("host", help="gateway address, with its port if not 80")
+        command.add_argument("--password", default=os.environ.get("WINDHAGER_PASSWORD"))
+        command.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY)
+        command.add_argument("--timeout", type=int, default=DEFAULT_REQUEST_TIMEOUT)
+        return command
+
+    command = add_command("poll", "read the OIDs exposed by the integration")
+    command.add_argument("--count", type=int, default=1)
+    command.add_argument("--interval", type=float, default=UPDATE_INTERVAL)
+    command.add_argument("--json", action="store_true")
+
+    command = add_command("dump", "read every datapoint below a lookup path")
+    command.add_argument("--path", default="/1")
+    command.add_argument("--output")
+
+    command = add_command("watch", "print the OIDs as they change")
+    command.add_argument("--interval", type=float, default=UPDATE_INTERVAL)
+    command.add_argument("--push", help="change feed path, e.g. /events")
+
+    command = add_command("benchmark", "measure full polling cycles")
+    command.add_argument("--cycles", type=int, default=10)
+    command.add_argument("--trace", action="store_true", help="time request phases")
+
+    args = parser.parse_args(argv)
+    if not args.password:
+        parser.error("a password is required (--password or WINDHAGER_PASSWORD)")
+    if args.command == "benchmark" and args.cycles < 1:
+        parser.error("--cycles must be at least 1")
+    return args
+
+
+async def run(args: argparse.Namespace) -> None:
+    client = WindhagerHttpClient(
+        args.host,
+        args.password,
+        max_concurrency=args.concurrency,
+        request_timeout=args.timeout,
+    )
+    try:
+        await COMMANDS[args.command](client, args)
+    finally:
+        await client.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -41,6 +41,9 @@ SEPARATORS = {
 }
 TOKEN = CHAR ^ CTL ^ SEPARATORS
 
+# Maximum number of cached HA2 hashes (one per method and path)
+HA2_CACHE_SIZE = 1024
+
 
 def parse_pair(pair):
     key, value = pair.split("=", 1)
@@ -69,7 +72,7 @@ class DigestAuth:
     https://github.com/requests/requests/blob/v2.18.4/requests/auth.py.
     """
 
-    def __init__(self, username, password, session, previous=None):
+    def __init__(self, username, password, session, previous=None, on_cpu_time=None):
         if previous is None:
             previous = {}
 
@@ -78,25 +81,38 @@ class DigestAuth:
         self.last_nonce = previous.get("last_nonce", "")
         self.nonce_count = previous.get("nonce_count", 0)
         self.challenge = previous.get("challenge")
-        self.args = {}
         self.session = session
-
-    async def request(self, method, url, *, headers=None, **kwargs):
+        # Time (in seconds) spent building digest headers, on the event loop
+        self.cpu_time = 0.0
+        # Called with the time spent on each header, if given
+        self.on_cpu_time = on_cpu_time
+        # HA1 only depends on the challenge realm and algorithm, HA2 on the
+        # method and path: both are cached instead of hashed per request
+        self._ha1_cache = {}
+        self._ha2_cache = {}
+
+    async def request(self, method, url, *, headers=None, trace=None, **kwargs):
+        return await self._request(method, url, headers, kwargs, True, trace)
+
+    async def _request(self, method, url, headers, kwargs, retry, trace=None):
         if headers is None:
             headers = {}
 
-        # Save the args so we can re-run the request
-        self.args = {"method": method, "url": url, "headers": headers, "kwargs": kwargs}
-
         if self.challenge:
             headers[hdrs.AUTHORIZATION] = self._build_digest_header(method.upper(), url)
+        if trace is not None:
+            trace.mark("auth")
 
         response = await self.session.request(method, url, headers=headers, **kwargs)
+        if trace is not None:
+            trace.mark("network")
 
         # Only try performing digest authentication if the response status is
-        # from 400 to 500.
-        if 400 <= response.status < 500:
-            return await self._handle_401(response)
+        # from 400 to 500, and only once per request.
+        if retry and 400 <= response.status < 500:
+            # The arguments are passed along rather than stored on the
+            # instance, so concurrent requests can each be re-run
+            return await self._handle_401(response, method, url, headers, kwargs, trace)
 
         return response
 
@@ -104,7 +120,16 @@ class DigestAuth:
         """
         :rtype: str
         """
-
+        start = time.perf_counter()
+        try:
+            return self._digest_header(method, url)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.cpu_time += elapsed
+            if self.on_cpu_time is not None:
+                self.on_cpu_time(elapsed)
+
+    def _digest_header(self, method, url):
         realm = self.challenge["realm"]
         nonce = self.challenge["nonce"]
         qop = self.challenge.get("qop")
@@ -129,11 +154,18 @@ class DigestAuth:
             return H("%s:%s" % (s, d))
 
         path = URL(url).path_qs
-        A1 = "%s:%s:%s" % (self.username, realm, self.password)
-        A2 = "%s:%s" % (method, path)
 
-        HA1 = H(A1)
-        HA2 = H(A2)
+        HA1 = self._ha1_cache.get((realm, algorithm))
+        if HA1 is None:
+            A1 = "%s:%s:%s" % (self.username, realm, self.password)
+            HA1 = self._ha1_cache[(realm, algorithm)] = H(A1)
+
+        HA2 = self._ha2_cache.get((algorithm, method, path))
+        if HA2 is None:
+            if len(self._ha2_cache) >= HA2_CACHE_SIZE:
+                self._ha2_cache.clear()
+            A2 = "%s:%s" % (method, path)
+            HA2 = self._ha2_cache[(algorithm, method, path)] = H(A2)
 
         if nonce == self.last_nonce:
             self.nonce_count += 1
@@ -145,15 +177,7 @@ class DigestAuth:
         ncvalue = "%08x" % self.nonce_count
 
         # cnonce is just a random string generated by the client.
-        cnonce_data = "".join(
-            [
-                str(self.nonce_count),
-                nonce,
-                time.ctime(),
-                os.urandom(8).decode(errors="ignore"),
-            ]
-        ).encode()
-        cnonce = hashlib.sha1(cnonce_data).hexdigest()[:16]
+        cnonce = os.urandom(8).hex()
 
         if algorithm == "MD5-SESS":
             HA1 = H("%s:%s:%s" % (HA1, nonce, cnonce))
@@ -183,7 +207,7 @@ class DigestAuth:
 
         return "Digest %s" % base
 
-    async def _handle_401(self, response):
+    async def _handle_401(self, response, method, url, headers, kwargs, trace=None):
         """
         Takes the given response and tries digest-auth, if needed.
         :rtype: ClientResponse
@@ -193,12 +217,8 @@ class DigestAuth:
         parts = auth_header.split(" ", 1)
         if "digest" == parts[0].lower() and len(parts) > 1:
             self.challenge = parse_key_value_list(parts[1])
+            response.release()
 
-            return await self.request(
-                self.args["method"],
-                self.args["url"],
-                headers=self.args["headers"],
-                **self.args["kwargs"],
-            )
+            return await self._request(method, url, headers, kwargs, False, trace)
 
         return response
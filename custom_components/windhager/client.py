@@ -1,27 +1,161 @@
 import aiohttp
+import asyncio
+import hashlib
+import json as jsonlib
 import logging
+import random
+import time
+from contextvars import ContextVar
+from types import MappingProxyType
+from aiohttp import hdrs
+from yarl import URL
 from .aiohelper import DigestAuth
-from .const import DEFAULT_USERNAME, CLIMATE_FUNCTION_TYPE, HEATER_FUNCTION_TYPE
+from .const import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_REQUEST_TIMEOUT,
+    DEFAULT_USERNAME,
+    CLIMATE_FUNCTION_TYPE,
+    CYCLE_LOOP_BUDGET,
+    HEATER_FUNCTION_TYPE,
+    LARGE_BODY_SIZE,
+    LONG_POLL_TIMEOUT,
+    OID_DEPTH,
+    OID_RETRY_ATTEMPTS,
+    OID_RETRY_DELAY,
+    QUARANTINE_PROBE_INTERVAL,
+    QUARANTINE_THRESHOLD,
+    WRITE_RETRY_DELAY,
+    WRITE_TIMEOUT,
+)
+from .ids import IdFactory
+from .models import (
+    PELLET_TOTAL,
+    POWER_FACTOR,
+    Datapoint,
+    Device,
+    Snapshot,
+    WriteResult,
+    group_by_type,
+    node_prefix,
+    same_value,
+)
+from .scheduler import PRIORITY_HIGH, PRIORITY_LOW, PriorityScheduler
+from .tracing import Tracer
 
 _LOGGER = logging.getLogger(__name__)
 
+# Event loop time (in seconds) of the cycle being read: its requests run in
+# tasks of their own, which inherit the (mutable) counter of the cycle
+_cycle_loop_time: ContextVar[list[float] | None] = ContextVar(
+    "cycle_loop_time", default=None
+)
+
+
+def _decode(body, known_digest):
+    """Return the digest of a body, and its JSON unless the digest is known"""
+    digest = hashlib.blake2b(body, digest_size=16).digest()
+    if digest == known_digest:
+        return digest, None
+    return digest, jsonlib.loads(body)
+
 
 class WindhagerHttpClient:
     """Raw API HTTP requests"""
 
-    def __init__(self, host, password) -> None:
+    def __init__(
+        self,
+        host,
+        password,
+        max_concurrency=DEFAULT_MAX_CONCURRENCY,
+        request_timeout=DEFAULT_REQUEST_TIMEOUT,
+    ) -> None:
         self.host = host
         self.password = password
+        self.max_concurrency = None
+        self.scheduler = None
+        self._timeout = None
+        # Decode large bodies off the event loop
+        self.bounded_loop = False
+        self.configure(max_concurrency, request_timeout)
+        # Time (in seconds) spent hashing and decoding on the event loop
+        self._loop_time = 0.0
+        self.metrics = {
+            "cycle_loop_time": None,
+            "max_cycle_loop_time": None,
+            "cache_hits": 0,
+            "retries": 0,
+            "quarantined": 0,
+            "writes": 0,
+            "writes_verified": 0,
+            "writes_failed": 0,
+            "write_retries": 0,
+            "offloaded_decodes": 0,
+            "export_dropped": 0,
+        }
+        # Consecutive failed or invalid reads, and next probe time of the
+        # quarantined OIDs
+        self.failures = {}
+        self.quarantine = {}
         self.oids = None
-        self.devices = []
+        self.nodes = ()
+        self.datapoints = MappingProxyType({})
+        # Result of "/1" when already known, used once by the discovery
+        self.topology = None
         self._session = None
         self._auth = None
+        # Per-URL cache of (etag, last_modified, body digest, decoded json)
+        self._cache = {}
+        # Unique IDs of the devices and entities, built once
+        self.ids = IdFactory(host)
+        # Request and cycle traces, off until enabled
+        self.tracer = Tracer()
+
+    def configure(self, max_concurrency, request_timeout, bounded_loop=False):
+        """Change the concurrency cap, request timeout and loop mode, live"""
+        if self.scheduler is None:
+            self.scheduler = PriorityScheduler(max_concurrency)
+        elif max_concurrency != self.max_concurrency:
+            # Requests in flight keep their slot
+            self.scheduler.resize(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self._timeout = aiohttp.ClientTimeout(total=request_timeout)
+        self.bounded_loop = bounded_loop
+
+    @property
+    def loop_time(self):
+        """Total time (in seconds) this client spent blocking the event loop"""
+        return self._loop_time
+
+    def _offload(self, size):
+        """Return whether to hash and decode a body in an executor
+
+        While the event loop usage is bounded, large bodies always are, and
+        every body of a cycle that used up its event loop budget.
+        """
+        if not self.bounded_loop:
+            return False
+        if size > LARGE_BODY_SIZE:
+            return True
+        cycle = _cycle_loop_time.get()
+        return cycle is not None and cycle[0] >= CYCLE_LOOP_BUDGET
+
+    def _add_loop_time(self, seconds):
+        """Account event loop time to the client, and to the current cycle"""
+        self._loop_time += seconds
+        cycle = _cycle_loop_time.get()
+        if cycle is not None:
+            cycle[0] += seconds
 
     async def _ensure_session(self):
         """Ensure that we have an active client session"""
         if self._session is None:
             self._session = aiohttp.ClientSession()
-            self._auth = DigestAuth(DEFAULT_USERNAME, self.password, self._session)
+            self._auth = DigestAuth(
+                DEFAULT_USERNAME,
+                self.password,
+                self._session,
+                on_cpu_time=self._add_loop_time,
+            )
 
     async def close(self):
         """Close the client session"""
@@ -29,410 +163,734 @@ class WindhagerHttpClient:
             await self._session.close()
             self._session = None
             self._auth = None
+        self._cache.clear()
 
-    async def fetch(self, url):
+    async def fetch(self, url, cache=True, priority=PRIORITY_LOW):
+        trace = self.tracer.start("request", url)
         try:
             await self._ensure_session()
-            ret = await self._auth.request(
-                "GET", f"http://{self.host}/api/1.0/lookup{url}"
-            )
-            json = await ret.json()
-            _LOGGER.debug("Fetched data for %s: %s", url, json)
+            headers = {}
+            cached = self._cache.get(url)
+            if cached is not None:
+                etag, last_modified, _, _ = cached
+                if etag:
+                    headers[hdrs.IF_NONE_MATCH] = etag
+                if last_modified:
+                    headers[hdrs.IF_MODIFIED_SINCE] = last_modified
+
+            async with self.scheduler.slot(priority):
+                trace.mark("queue")
+                ret = await self._auth.request(
+                    "GET",
+                    f"http://{self.host}/api/1.0/lookup{url}",
+                    headers=headers,
+                    timeout=self._timeout,
+                    trace=trace,
+                )
+                trace.set(status=ret.status)
+                if ret.status == 304 and cached is not None:
+                    ret.release()
+                    self.metrics["cache_hits"] += 1
+                    trace.set(cached=True)
+                    _LOGGER.debug("Data for %s not modified", url)
+                    return cached[3]
+                body = await ret.read()
+                trace.mark("network")
+
+            # Gateways without conditional request support: skip decoding
+            # when the raw body is byte-for-byte identical to the last one
+            known = cached[2] if cached is not None else None
+            if self._offload(len(body)):
+                self.metrics["offloaded_decodes"] += 1
+                digest, json = await asyncio.get_running_loop().run_in_executor(
+                    None, _decode, body, known
+                )
+            else:
+                start = time.perf_counter()
+                digest, json = _decode(body, known)
+                self._add_loop_time(time.perf_counter() - start)
+            trace.mark("decode")
+            if digest == known:
+                self.metrics["cache_hits"] += 1
+                trace.set(cached=True)
+                _LOGGER.debug("Data for %s unchanged", url)
+                return cached[3]
+
+            if cache and ret.status == 200:
+                self._cache[url] = (
+                    ret.headers.get(hdrs.ETAG),
+                    ret.headers.get(hdrs.LAST_MODIFIED),
+                    digest,
+                    json,
+                )
+            # Only the size: full bodies flood the log when polling at scale
+            _LOGGER.debug("Fetched %d bytes for %s", len(body), url)
             return json
         except Exception as e:
-            _LOGGER.error("Failed to fetch data for %s: %s", url, str(e))
+            trace.set(error=str(e) or type(e).__name__)
+            # Callers retry or report the failure, once
+            _LOGGER.debug("Failed to fetch data for %s: %s", url, str(e))
             raise
+        finally:
+            self.tracer.end(trace)
+
+    async def update(self, oid, value, timeout=WRITE_TIMEOUT):
+        """Write the value of an OID, and check that the gateway applied it
+
+        The value is checked against the PUT response when it reports one,
+        or else read back. Writes that fail or do not stick are retried until
+        `timeout` (in seconds) runs out.
+        """
+        value = str(value)
+        deadline = time.monotonic() + timeout
+        self.metrics["writes"] += 1
+        attempt = 0
+        actual = error = None
+        while True:
+            attempt += 1
+            try:
+                actual = await self._put(oid, value)
+                if actual is None:
+                    actual = await self.fetch_value(oid, priority=PRIORITY_HIGH)
+                error = None
+                if same_value(value, actual):
+                    self.metrics["writes_verified"] += 1
+                    return WriteResult(oid, value, True, attempt, actual)
+                _LOGGER.debug("OID %s is %s after writing %s", oid, actual, value)
+            except Exception as e:
+                error = str(e)
+                _LOGGER.debug("Failed to write %s to OID %s: %s", value, oid, error)
+
+            delay = WRITE_RETRY_DELAY * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+            if time.monotonic() + delay >= deadline:
+                break
+            self.metrics["write_retries"] += 1
+            await asyncio.sleep(delay)
+
+        self.metrics["writes_failed"] += 1
+        _LOGGER.warning(
+            "Could not write %s to OID %s after %d attempts (%s)",
+            value,
+            oid,
+            attempt,
+            error or f"value is {actual}",
+        )
+        return WriteResult(oid, value, False, attempt, actual, error)
 
-    async def update(self, oid, value):
+    async def _put(self, oid, value):
+        """PUT a datapoint, return the value in the response if any"""
         await self._ensure_session()
-        await self._auth.request(
-            "PUT",
-            f"http://{self.host}/api/1.0/datapoint",
-            data=bytes(f'{{"OID":"{oid}","value":"{value}"}}', "utf-8"),
+        # Writes come from users, ahead of the polling
+        async with self.scheduler.slot(PRIORITY_HIGH):
+            ret = await self._auth.request(
+                "PUT",
+                f"http://{self.host}/api/1.0/datapoint",
+                data=jsonlib.dumps({"OID": oid, "value": value}).encode(),
+                timeout=self._timeout,
+            )
+            try:
+                ret.raise_for_status()
+                body = await ret.read()
+            finally:
+                ret.release()
+        try:
+            json = jsonlib.loads(body)
+        except ValueError:
+            return None
+        if isinstance(json, dict) and "value" in json and json.get("OID", oid) == oid:
+            return json["value"]
+        return None
+
+    async def poll_changes(self, path, cursor=None, timeout=LONG_POLL_TIMEOUT):
+        """Wait for changes on a change feed of the gateway
+
+        Long-polls `path` (below /api/1.0) and returns the changed values by
+        OID, with the cursor to resume from. The request does not take a
+        concurrency slot, since it mostly waits.
+        """
+        await self._ensure_session()
+        url = URL(f"http://{self.host}/api/1.0{path}")
+        if cursor is not None:
+            url = url.with_query(since=cursor)
+        ret = await self._auth.request(
+            "GET",
+            str(url),
+            timeout=aiohttp.ClientTimeout(total=timeout + self._timeout.total),
         )
+        try:
+            ret.raise_for_status()
+            body = await ret.read() if ret.status != 204 else b""
+        finally:
+            ret.release()
 
-    @staticmethod
-    def slugify(identifier_str):
-        return identifier_str.replace(".", "-").replace("/", "-")
+        start = time.perf_counter()
+        json = jsonlib.loads(body) if body.strip() else []
+        # Either a list of datapoints, or the datapoints with a cursor
+        if isinstance(json, dict):
+            cursor = json.get("cursor", cursor)
+            json = json.get("values", [])
+        values = {}
+        for item in json:
+            if isinstance(item, dict) and "OID" in item and "value" in item:
+                value = item["value"]
+                values[item["OID"]] = None if value == "-.-" else value
+        self._add_loop_time(time.perf_counter() - start)
+        return values, cursor
 
-    async def fetch_all(self):
-        if self.oids is None:
-            self.oids = set()
-            # Fetch all devices on the network
+    async def fetch_value(self, oid, priority=PRIORITY_LOW):
+        """Read the value of a single OID, None if missing or invalid"""
+        json = await self.fetch(oid, priority=priority)
+        if "value" in json and json["value"] != "-.-":
+            return json["value"]
+        _LOGGER.debug("Invalid or missing value for OID %s: %s", oid, json)
+        return None
+
+    async def discover(self):
+        """Discover the devices of the gateway and the datapoints to expose"""
+        oids = set()
+        datapoints = []
+        ids = self.ids
+        # Gateway health metrics
+        datapoints.append(
+            Datapoint(
+                id=ids.unique_id("/cycle_loop_time"),
+                name=f"Windhager gateway ({self.host}) Event loop time",
+                type="metric",
+                metric="cycle_loop_time",
+                unit="ms",
+                device_id=ids.device_id(),
+                device_name=f"Windhager gateway ({self.host})",
+            )
+        )
+        # Fetch all devices on the network
+        json_devices = self.topology
+        if json_devices is None:
             json_devices = await self.fetch("/1")
+        self.topology = None
 
-            # Add devices
-            for device in json_devices:
-                device_id = f"/1/{str(device['nodeId'])}"
+        nodes = tuple(Device.from_json(device) for device in json_devices)
 
-                if "functions" not in device:
-                    _LOGGER.debug("Device %s has no functions, skipping.", device_id)
-                    continue
+        # Add devices
+        for node in nodes:
+            device_id = node.prefix
 
-                # Filter climate controls
-                functions = list(
-                    filter(
-                        lambda f: (
-                            f["fctType"] == CLIMATE_FUNCTION_TYPE and f["lock"] is False
-                        ),
-                        device["functions"],
-                    )
-                )
-                if len(functions) > 0:
-                    fct_id = f"/{str(functions[0]['fctId'])}"
-
-                    # Climate control
-                    self.devices.append(
-                        {
-                            "id": self.slugify(f"{self.host}{device_id}"),
-                            "name": functions[0]["name"],
-                            "type": "climate",
-                            "prefix": device_id,
-                            "oids": [
-                                f"{fct_id}/0/1/0",
-                                f"{fct_id}/1/1/0",
-                                f"{fct_id}/3/50/0",
-                                f"{fct_id}/2/10/0",
-                                f"{fct_id}/3/58/0",
-                            ],
-                            "device_id": self.slugify(f"{self.host}{device_id}"),
-                            "device_name": functions[0]["name"],
-                        }
-                    )
-                    self.oids.update(
-                        [
-                            # Current temperature
+            if not node.functions:
+                _LOGGER.debug("Device %s has no functions, skipping.", device_id)
+                continue
+
+            # Filter climate controls
+            functions = node.functions_of_type(CLIMATE_FUNCTION_TYPE)
+            if len(functions) > 0:
+                fct_id = f"/{str(functions[0].fct_id)}"
+
+                # Climate control
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(device_id),
+                        name=functions[0].name,
+                        type="climate",
+                        prefix=f"{device_id}{fct_id}",
+                        oids=(
                             f"{device_id}{fct_id}/0/1/0",
-                            # Target temperature
                             f"{device_id}{fct_id}/1/1/0",
-                            # Current selected mode
                             f"{device_id}{fct_id}/3/50/0",
-                            # Duration of custom temperature (in minutes)
                             f"{device_id}{fct_id}/2/10/0",
-                            # Outside temperature
-                            f"{device_id}{fct_id}/0/0/0",
-                            # Temp comfort correction
                             f"{device_id}{fct_id}/3/58/0",
-                            # Tempe correction
-                            f"{device_id}{fct_id}/3/7/0",
-                        ]
+                        ),
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
+                )
+                oids.update(
+                    [
+                        # Current temperature
+                        f"{device_id}{fct_id}/0/1/0",
+                        # Target temperature
+                        f"{device_id}{fct_id}/1/1/0",
+                        # Current selected mode
+                        f"{device_id}{fct_id}/3/50/0",
+                        # Duration of custom temperature (in minutes)
+                        f"{device_id}{fct_id}/2/10/0",
+                        # Outside temperature
+                        f"{device_id}{fct_id}/0/0/0",
+                        # Temp comfort correction
+                        f"{device_id}{fct_id}/3/58/0",
+                        # Tempe correction
+                        f"{device_id}{fct_id}/3/7/0",
+                    ]
+                )
 
-                    # Current temperature
-                    self.devices.append(
-                        {
-                            "id": self.slugify(
-                                f"{self.host}/1/{str(device['nodeId'])}{fct_id}/0/1/0/3/58/0"
-                            ),
-                            "name": f"{functions[0]['name']} Current Temperature",
-                            "type": "temperature",
-                            "correction_oid": f"{device_id}{fct_id}/3/58/0",
-                            "oid": f"{device_id}{fct_id}/0/1/0",
-                            "device_id": self.slugify(
-                                f"{self.host}{str(device['nodeId'])}"
-                            ),
-                            "device_name": functions[0]["name"],
-                        }
+                # Current temperature
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/0/1/0/3/58/0"),
+                        name=f"{functions[0].name} Current Temperature",
+                        type="temperature",
+                        prefix=f"{device_id}{fct_id}",
+                        correction_oid=f"{device_id}{fct_id}/3/58/0",
+                        oid=f"{device_id}{fct_id}/0/1/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
+                )
 
-                    # Current temperature (real)
-                    self.devices.append(
-                        {
-                            "id": self.slugify(
-                                f"{self.host}/1/{str(device['nodeId'])}{fct_id}/0/1/0"
-                            ),
-                            "name": f"{functions[0]['name']} Current Temperature real",
-                            "type": "temperature",
-                            "oid": f"{device_id}{fct_id}/0/1/0",
-                            "device_id": self.slugify(
-                                f"{self.host}{str(device['nodeId'])}"
-                            ),
-                            "device_name": functions[0]["name"],
-                        }
+                # Current temperature (real)
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/0/1/0"),
+                        name=f"{functions[0].name} Current Temperature real",
+                        type="temperature",
+                        oid=f"{device_id}{fct_id}/0/1/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
+                )
 
-                    # Comfort Temperature correction
-                    self.devices.append(
-                        {
-                            "id": self.slugify(
-                                f"{self.host}/1/{str(device['nodeId'])}{fct_id}/3/58/0"
-                            ),
-                            "name": f"{functions[0]['name']} Comfort Temperature Correction",
-                            "type": "sensor",
-                            "device_class": None,
-                            "state_class": None,
-                            "unit": "K",
-                            "oid": f"{device_id}{fct_id}/3/58/0",
-                            "device_id": self.slugify(
-                                f"{self.host}{str(device['nodeId'])}"
-                            ),
-                            "device_name": functions[0]["name"],
-                        }
+                # Comfort Temperature correction
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/3/58/0"),
+                        name=f"{functions[0].name} Comfort Temperature Correction",
+                        type="sensor",
+                        device_class=None,
+                        state_class=None,
+                        unit="K",
+                        oid=f"{device_id}{fct_id}/3/58/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
-                    # Current Temperature correction
-                    self.devices.append(
-                        {
-                            "id": self.slugify(
-                                f"{self.host}/1/{str(device['nodeId'])}{fct_id}/3/7/0"
-                            ),
-                            "name": f"{functions[0]['name']} Current Temperature Correction",
-                            "type": "sensor",
-                            "device_class": None,
-                            "state_class": None,
-                            "unit": "K",
-                            "oid": f"{device_id}{fct_id}/3/7/0",
-                            "device_id": self.slugify(
-                                f"{self.host}{str(device['nodeId'])}"
-                            ),
-                            "device_name": functions[0]["name"],
-                        }
+                )
+                # Current Temperature correction
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/3/7/0"),
+                        name=f"{functions[0].name} Current Temperature Correction",
+                        type="sensor",
+                        device_class=None,
+                        state_class=None,
+                        unit="K",
+                        oid=f"{device_id}{fct_id}/3/7/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
-                    # Target temperature
-                    self.devices.append(
-                        {
-                            "id": self.slugify(
-                                f"{self.host}/1/{str(device['nodeId'])}{fct_id}/1/1/0"
-                            ),
-                            "name": f"{functions[0]['name']} Target Temperature",
-                            "type": "temperature",
-                            "correction_oid": f"{device_id}{fct_id}/3/58/0",
-                            "oid": f"{device_id}{fct_id}/1/1/0",
-                            "device_id": self.slugify(
-                                f"{self.host}{str(device['nodeId'])}"
-                            ),
-                            "device_name": functions[0]["name"],
-                        }
+                )
+                # Target temperature
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/1/1/0"),
+                        name=f"{functions[0].name} Target Temperature",
+                        type="temperature",
+                        prefix=f"{device_id}{fct_id}",
+                        correction_oid=f"{device_id}{fct_id}/3/58/0",
+                        oid=f"{device_id}{fct_id}/1/1/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
-                    # Outside temperature
-                    self.devices.append(
-                        {
-                            "id": self.slugify(
-                                f"{self.host}/1/{str(device['nodeId'])}{fct_id}/0/0/0"
-                            ),
-                            "name": f"{functions[0]['name']} Outside Temperature",
-                            "type": "temperature",
-                            "oid": f"{device_id}{fct_id}/0/0/0",
-                            "device_id": self.slugify(
-                                f"{self.host}{str(device['nodeId'])}"
-                            ),
-                            "device_name": functions[0]["name"],
-                        }
+                )
+                # Outside temperature
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/0/0/0"),
+                        name=f"{functions[0].name} Outside Temperature",
+                        type="temperature",
+                        oid=f"{device_id}{fct_id}/0/0/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
+                )
 
-                # Filter heaters
-                functions = list(
-                    filter(
-                        lambda f: (
-                            f["fctType"] == HEATER_FUNCTION_TYPE and f["lock"] is False
-                        ),
-                        device["functions"],
+            # Filter heaters
+            functions = node.functions_of_type(HEATER_FUNCTION_TYPE)
+            if len(functions) > 0:
+                fct_id = f"/{str(functions[0].fct_id)}"
+
+                oids.update(
+                    [
+                        # Heater power (percent)
+                        f"{device_id}{fct_id}/0/9/0",
+                        # Fumes temperature
+                        f"{device_id}{fct_id}/0/11/0",
+                        # Heater temperature
+                        f"{device_id}{fct_id}/0/7/0",
+                        # Combustion chamber temperature
+                        f"{device_id}{fct_id}/0/45/0",
+                        # Heater status
+                        f"{device_id}{fct_id}/2/1/0",
+                        # Pellet consumption
+                        f"{device_id}{fct_id}/23/100/0",
+                        f"{device_id}{fct_id}/23/103/0",
+                        # Cleaning
+                        f"{device_id}{fct_id}/20/61/0",
+                        f"{device_id}{fct_id}/20/62/0",
+                    ]
+                )
+
+                # Heater current power factor
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/0/9/0"),
+                        name=f"{functions[0].name} Power factor",
+                        type="sensor",
+                        device_class="power_factor",
+                        state_class=None,
+                        unit="%",
+                        oid=f"{device_id}{fct_id}/0/9/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
                 )
-                if len(functions) > 0:
-                    fct_id = f"/{str(functions[0]['fctId'])}"
-
-                    self.oids.update(
-                        [
-                            # Heater power (percent)
-                            f"{device_id}{fct_id}/0/9/0",
-                            # Fumes temperature
-                            f"{device_id}{fct_id}/0/11/0",
-                            # Heater temperature
-                            f"{device_id}{fct_id}/0/7/0",
-                            # Combustion chamber temperature
-                            f"{device_id}{fct_id}/0/45/0",
-                            # Heater status
-                            f"{device_id}{fct_id}/2/1/0",
-                            # Pellet consumption
-                            f"{device_id}{fct_id}/23/100/0",
-                            f"{device_id}{fct_id}/23/103/0",
-                            # Cleaning
-                            f"{device_id}{fct_id}/20/61/0",
-                            f"{device_id}{fct_id}/20/62/0",
-                        ]
+                # Fumes temperature
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/0/11/0"),
+                        name=f"{functions[0].name} Fumes Temperature",
+                        type="temperature",
+                        oid=f"{device_id}{fct_id}/0/11/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
-
-                    # Heater current power factor
-                    self.devices.append(
-                        {
-                            "id": self.slugify(
-                                f"{self.host}/1/{str(device['nodeId'])}{fct_id}/0/9/0"
-                            ),
-                            "name": f"{functions[0]['name']} Power factor",
-                            "type": "sensor",
-                            "device_class": "power_factor",
-                            "state_class": None,
-                            "unit": "%",
-                            "oid": f"{device_id}{fct_id}/0/9/0",
-                            "device_id": self.slugify(
-                                f"{self.host}{str(device['nodeId'])}"
-                            ),
-                            "device_name": functions[0]["name"],
-                        }
+                )
+                # Heater temperature
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/0/7/0"),
+                        name=f"{functions[0].name} Heater Temperature",
+                        type="temperature",
+                        oid=f"{device_id}{fct_id}/0/7/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
+                    )
+                )
+                # Combustion chamber temperature
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/0/45/0"),
+                        name=f"{functions[0].name} Combustion chamber Temperature",
+                        type="temperature",
+                        oid=f"{device_id}{fct_id}/0/45/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
+                    )
+                )
+                # Heater status
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/2/1/0"),
+                        name=f"{functions[0].name} Heater status",
+                        type="heater_status",
+                        oid=f"{device_id}{fct_id}/2/1/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
+                    )
+                )
+                # Burner cycles
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/2/1/0/cycles"),
+                        name=f"{functions[0].name} Burner cycles today",
+                        type="cycles",
+                        oid=f"{device_id}{fct_id}/2/1/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
+                    )
+                )
+                # Pellet consumption
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/23/100/0"),
+                        name=f"{functions[0].name} Pellet consumption",
+                        type="total",
+                        oid=f"{device_id}{fct_id}/23/100/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
+                    )
+                )
+                # Total pellet consumption
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/23/103/0"),
+                        name=f"{functions[0].name} Total Pellet consumption",
+                        type="total_increasing",
+                        oid=f"{device_id}{fct_id}/23/103/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
-                    # Fumes temperature
-                    self.devices.append(
-                        {
-                            "id": self.slugify(
-                                f"{self.host}/1/{str(device['nodeId'])}{fct_id}/0/11/0"
-                            ),
-                            "name": f"{functions[0]['name']} Fumes Temperature",
-                            "type": "temperature",
-                            "oid": f"{device_id}{fct_id}/0/11/0",
-                            "device_id": self.slugify(
-                                f"{self.host}{str(device['nodeId'])}"
-                            ),
-                            "device_name": functions[0]["name"],
-                        }
+                )
+
+                # Pellet consumption rate
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/23/103/0/rate"),
+                        name=f"{functions[0].name} Pellet consumption rate",
+                        type="statistic",
+                        statistic="rate",
+                        device_class=None,
+                        unit="kg/h",
+                        # Counter is in tonnes
+                        scale=1000,
+                        oid=f"{device_id}{fct_id}/23/103/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
-                    # Heater temperature
-                    self.devices.append(
-                        {
-                            "id": self.slugify(
-                                f"{self.host}/1/{str(device['nodeId'])}{fct_id}/0/7/0"
-                            ),
-                            "name": f"{functions[0]['name']} Heater Temperature",
-                            "type": "temperature",
-                            "oid": f"{device_id}{fct_id}/0/7/0",
-                            "device_id": self.slugify(
-                                f"{self.host}{str(device['nodeId'])}"
-                            ),
-                            "device_name": functions[0]["name"],
-                        }
+                )
+                # Energy of the pellets burnt, heat output and cost, for the
+                # energy dashboard
+                for quantity, name, device_class, state_class, unit, oid in (
+                    (
+                        "pellet_energy",
+                        "Pellet energy",
+                        "energy",
+                        "total_increasing",
+                        "kWh",
+                        PELLET_TOTAL,
+                    ),
+                    (
+                        "heat_energy",
+                        "Heat energy",
+                        "energy",
+                        "total_increasing",
+                        "kWh",
+                        POWER_FACTOR,
+                    ),
+                    (
+                        "heat_power",
+                        "Heat output",
+                        "power",
+                        "measurement",
+                        "kW",
+                        POWER_FACTOR,
+                    ),
+                    ("cost", "Pellet cost", "monetary", "total", None, PELLET_TOTAL),
+                ):
+                    datapoints.append(
+                        Datapoint(
+                            id=ids.unique_id(f"{device_id}{fct_id}/{quantity}"),
+                            name=f"{functions[0].name} {name}",
+                            type="energy",
+                            quantity=quantity,
+                            device_class=device_class,
+                            state_class=state_class,
+                            unit=unit,
+                            oid=f"{device_id}{fct_id}{oid}",
+                            prefix=f"{device_id}{fct_id}",
+                            device_id=ids.device_id(device_id),
+                            device_name=functions[0].name,
+                        )
                     )
-                    # Combustion chamber temperature
-                    self.devices.append(
-                        {
-                            "id": self.slugify(
-                                f"{self.host}/1/{str(device['nodeId'])}{fct_id}/0/45/0"
-                            ),
-                            "name": f"{functions[0]['name']} Combustion chamber Temperature",
-                            "type": "temperature",
-                            "oid": f"{device_id}{fct_id}/0/45/0",
-                            "device_id": self.slugify(
-                                f"{self.host}{str(device['nodeId'])}"
-                            ),
-                            "device_name": functions[0]["name"],
-                        }
+                # Burner on ratio
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/2/1/0/on_ratio"),
+                        name=f"{functions[0].name} Burner on ratio",
+                        type="statistic",
+                        statistic="on_ratio",
+                        device_class=None,
+                        unit="%",
+                        scale=100,
+                        oid=f"{device_id}{fct_id}/2/1/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
-                    # Heater status
-                    self.devices.append(
-                        {
-                            "id": self.slugify(
-                                f"{self.host}/1/{str(device['nodeId'])}{fct_id}/2/1/0"
-                            ),
-                            "name": f"{functions[0]['name']} Heater status",
-                            "options": [
-                                "Brûleur bloqué",
-                                "Autotest",
-                                "Eteindre gén. chaleur",
-                                "Veille",
-                                "Brûleur ARRET",
-                                "Prérinçage",
-                                "Phase d'allumage",
-                                "Stabilisation flamme",
-                                "Mode modulant",
-                                "Chaudière bloqué",
-                                "Veille temps différé",
-                                "Ventilateur Arrêté",
-                                "Porte de revêtement ouverte",
-                                "Allumage prêt",
-                                "Annuler phase d'allumage",
-                                "Préchauffage en cours",
-                            ],
-                            "type": "select",
-                            "oid": f"{device_id}{fct_id}/2/1/0",
-                            "device_id": self.slugify(
-                                f"{self.host}{str(device['nodeId'])}"
-                            ),
-                            "device_name": functions[0]["name"],
-                        }
+                )
+                # Fumes temperature average
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/0/11/0/mean"),
+                        name=f"{functions[0].name} Fumes Temperature average",
+                        type="statistic",
+                        statistic="mean",
+                        device_class="temperature",
+                        unit="°C",
+                        scale=1,
+                        oid=f"{device_id}{fct_id}/0/11/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
-                    # Pellet consumption
-                    self.devices.append(
-                        {
-                            "id": self.slugify(
-                                f"{self.host}/1/{str(device['nodeId'])}{fct_id}/23/100/0"
-                            ),
-                            "name": f"{functions[0]['name']} Pellet consumption",
-                            "type": "total",
-                            "oid": f"{device_id}{fct_id}/23/100/0",
-                            "device_id": self.slugify(
-                                f"{self.host}{str(device['nodeId'])}"
-                            ),
-                            "device_name": functions[0]["name"],
-                        }
+                )
+                # Heater temperature average
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/0/7/0/mean"),
+                        name=f"{functions[0].name} Heater Temperature average",
+                        type="statistic",
+                        statistic="mean",
+                        device_class="temperature",
+                        unit="°C",
+                        scale=1,
+                        oid=f"{device_id}{fct_id}/0/7/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
-                    # Total pellet consumption
-                    self.devices.append(
-                        {
-                            "id": self.slugify(
-                                f"{self.host}/1/{str(device['nodeId'])}{fct_id}/23/103/0"
-                            ),
-                            "name": f"{functions[0]['name']} Total Pellet consumption",
-                            "type": "total_increasing",
-                            "oid": f"{device_id}{fct_id}/23/103/0",
-                            "device_id": self.slugify(
-                                f"{self.host}{str(device['nodeId'])}"
-                            ),
-                            "device_name": functions[0]["name"],
-                        }
+                )
+
+                # Running time until stage 1 cleaning
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/20/61/0"),
+                        name=f"{functions[0].name} Running time until stage 1 cleaning",
+                        type="sensor",
+                        device_class="duration",
+                        state_class=None,
+                        unit="h",
+                        oid=f"{device_id}{fct_id}/20/61/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
+                )
 
-                    # Running time until stage 1 cleaning
-                    self.devices.append(
-                        {
-                            "id": self.slugify(
-                                f"{self.host}/1/{str(device['nodeId'])}{fct_id}/20/61/0"
-                            ),
-                            "name": f"{functions[0]['name']} Running time until stage 1 cleaning",
-                            "type": "sensor",
-                            "device_class": "duration",
-                            "state_class": None,
-                            "unit": "h",
-                            "oid": f"{device_id}{fct_id}/20/61/0",
-                            "device_id": self.slugify(
-                                f"{self.host}{str(device['nodeId'])}"
-                            ),
-                            "device_name": functions[0]["name"],
-                        }
+                # Running time until stage 2 cleaning
+                datapoints.append(
+                    Datapoint(
+                        id=ids.unique_id(f"{device_id}{fct_id}/20/62/0"),
+                        name=f"{functions[0].name} Running time until stage 2 cleaning",
+                        type="sensor",
+                        device_class="duration",
+                        state_class=None,
+                        unit="h",
+                        oid=f"{device_id}{fct_id}/20/62/0",
+                        device_id=ids.device_id(device_id),
+                        device_name=functions[0].name,
                     )
+                )
+
+        self.nodes = nodes
+        self.datapoints = group_by_type(datapoints)
+        self.oids = oids
+
+    async def fetch_all(self, deadline=None, oids=None):
+        """Read every exposed OID, or the given ones
+
+        Failed reads are retried with a jittered backoff, as long as the
+        retry fits before `deadline` (a time.monotonic() value).
+        """
+        if self.oids is None:
+            await self.discover()
+        trace = self.tracer.start(
+            "cycle",
+            f"{self.host}{node_prefix(next(iter(oids)))}" if oids else self.host,
+        )
+
+        values = {}
+        errors = set()
+
+        async def read(oid, attempts):
+            for attempt in range(attempts):
+                try:
+                    values[oid] = await self.fetch_value(oid)
+                    return
+                except Exception as e:
+                    delay = OID_RETRY_DELAY * 2**attempt * random.uniform(0.5, 1.5)
+                    if attempt + 1 == attempts or (
+                        deadline is not None and time.monotonic() + delay >= deadline
+                    ):
+                        values[oid] = None
+                        errors.add(oid)
+                        _LOGGER.error("Error while fetching OID %s: %s", oid, str(e))
+                        return
+                    self.metrics["retries"] += 1
+                    await asyncio.sleep(delay)
+
+        # Read all found OIDs but the quarantined ones, probed once when due,
+        # the scheduler caps the requests in flight
+        now = time.monotonic()
+        reads = []
+        for oid in self.oids if oids is None else oids:
+            probe = self.quarantine.get(oid)
+            if probe is None or probe <= now:
+                reads.append(oid)
+            else:
+                values[oid] = None
+        # Only this cycle's work: other nodes are read at the same time
+        cycle_loop_time = [0.0]
+        token = _cycle_loop_time.set(cycle_loop_time)
+        try:
+            await asyncio.gather(
+                *(
+                    read(oid, 1 if oid in self.quarantine else OID_RETRY_ATTEMPTS)
+                    for oid in reads
+                )
+            )
+            trace.mark("read")
+
+            # A gateway or node failing as a whole is not the fault of its OIDs
+            if reads and len(errors) == len(reads):
+                raise ConnectionError(f"None of the {len(reads)} OIDs could be read")
+            self._update_quarantine(reads, values)
+
+            loop_time = round(cycle_loop_time[0] * 1000, 3)
+            self.metrics["cycle_loop_time"] = loop_time
+            self.metrics["max_cycle_loop_time"] = max(
+                loop_time, self.metrics["max_cycle_loop_time"] or 0
+            )
+            _LOGGER.debug("Cycle used the event loop for %.3f ms", loop_time)
 
-                    # Running time until stage 2 cleaning
-                    self.devices.append(
-                        {
-                            "id": self.slugify(
-                                f"{self.host}/1/{str(device['nodeId'])}{fct_id}/20/62/0"
-                            ),
-                            "name": f"{functions[0]['name']} Running time until stage 2 cleaning",
-                            "type": "sensor",
-                            "device_class": "duration",
-                            "state_class": None,
-                            "unit": "h",
-                            "oid": f"{device_id}{fct_id}/20/62/0",
-                            "device_id": self.slugify(
-                                f"{self.host}{str(device['nodeId'])}"
-                            ),
-                            "device_name": functions[0]["name"],
-                        }
+            snapshot = Snapshot(self.nodes, self.datapoints, MappingProxyType(values))
+            trace.mark("parse")
+            return snapshot
+        finally:
+            _cycle_loop_time.reset(token)
+            trace.set(oids=len(reads), errors=len(errors))
+            self.tracer.end(trace)
+
+    def _update_quarantine(self, oids, values):
+        """Quarantine the OIDs failing repeatedly, release the recovered ones"""
+        now = time.monotonic()
+        for oid in oids:
+            if values[oid] is not None:
+                self.failures.pop(oid, None)
+                if self.quarantine.pop(oid, None) is not None:
+                    _LOGGER.info("OID %s recovered, reading it again", oid)
+                continue
+            # Failed or invalid ("-.-") value
+            failures = self.failures[oid] = self.failures.get(oid, 0) + 1
+            if failures >= QUARANTINE_THRESHOLD:
+                if oid not in self.quarantine:
+                    _LOGGER.info(
+                        "OID %s failed %d times, probing it every %d s",
+                        oid,
+                        failures,
+                        QUARANTINE_PROBE_INTERVAL,
                     )
+                self.quarantine[oid] = now + QUARANTINE_PROBE_INTERVAL
+        self.metrics["quarantined"] = len(self.quarantine)
 
-        ret = {
-            "devices": self.devices,
-            "oids": {},
-        }
+    async def walk(self, path="/1"):
+        """Read every datapoint below the given lookup path
+
+        Returns a snapshot with the value of every OID found, and the
+        paths that could not be read.
+        """
+        snapshot = {"host": self.host, "path": path, "values": {}, "errors": {}}
 
-        # Read all found OIDs
-        for oid in self.oids:
+        async def visit(url):
             try:
-                json = await self.fetch(oid)
-                if "value" in json and json["value"] != "-.-":
-                    ret["oids"][oid] = json["value"]
-                else:
-                    ret["oids"][oid] = None
-                    _LOGGER.debug("Invalid or missing value for OID %s: %s", oid, json)
+                json = await self.fetch(url, cache=False)
             except Exception as e:
-                ret["oids"][oid] = None
-                _LOGGER.error("Error while fetching OID %s: %s", oid, str(e))
+                snapshot["errors"][url] = str(e)
+                return
+
+            if isinstance(json, dict):
+                if "value" in json:
+                    snapshot["values"][json.get("OID", url)] = json["value"]
+                    return
+                # Node description, its sub-levels are its functions
+                json = json.get("functions", [])
+
+            children = []
+            for item in json:
+                if not isinstance(item, dict):
+                    # Plain list of sub-level identifiers
+                    children.append(f"{url}/{item}")
+                elif "value" in item:
+                    snapshot["values"][item.get("OID", url)] = item["value"]
+                elif "nodeId" in item:
+                    children.append(f"{url}/{item['nodeId']}")
+                elif "fctId" in item:
+                    children.append(f"{url}/{item['fctId']}")
+
+            # Full OIDs are /subnet/node/function/group/member/instance
+            children = [c for c in children if c.count("/") <= OID_DEPTH]
+            await asyncio.gather(*(visit(child) for child in children))
 
-        return ret
+        await visit(path.rstrip("/"))
+        return snapshot
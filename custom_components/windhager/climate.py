@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 import logging
-import voluptuous as vol
+from dataclasses import replace
 from typing import Optional
 
 from homeassistant.components.climate import ClimateEntity
@@ -18,9 +18,21 @@ from homeassistant.helpers import entity_platform
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from . import DOMAIN
+from .const import DOMAIN, PRESET_MODES
 from .exceptions import WindhagerValueError
-from .helpers import get_oid_value
+from .models import (
+    COMFORT_CORRECTION,
+    CUSTOM_TEMPERATURE_DURATION,
+    SELECTED_MODE,
+    SET_TEMPERATURE,
+    ClimateState,
+    Datapoint,
+    WriteResult,
+)
+from .services import (
+    SERVICE_SET_CURRENT_TEMP_COMPENSATION,
+    SET_CURRENT_TEMP_COMPENSATION_SCHEMA,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -29,28 +41,25 @@ async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities
 ) -> None:
     """Set up Windhager climates from a config entry."""
-    platform = entity_platform.async_get_current_platform()
-    platform.async_register_entity_service(
-        "set_current_temp_compensation",
-        {
-            vol.Required("compensation"): vol.All(
-                vol.Coerce(float), vol.Range(min=-3.5, max=3.5)
-            ),
-        },
-        "set_current_temp_compensation",
-    )
-
-    coordinator = hass.data[DOMAIN][entry.entry_id]
+    # Registered by the first entry only, it calls the climates of every entry
+    if not hass.services.has_service(DOMAIN, SERVICE_SET_CURRENT_TEMP_COMPENSATION):
+        entity_platform.async_get_current_platform().async_register_entity_service(
+            SERVICE_SET_CURRENT_TEMP_COMPENSATION,
+            SET_CURRENT_TEMP_COMPENSATION_SCHEMA,
+            "set_current_temp_compensation",
+        )
+
+    gateway = hass.data[DOMAIN][entry.entry_id]
     entities = []
 
-    for device_info in coordinator.data.get("devices", []):
-        if device_info.get("type") == "climate":
-            entities.extend(
-                [
-                    WindhagerThermostatClimate(coordinator, device_info),
-                    WindhagerThermostatClimateWithoutBias(coordinator, device_info),
-                ]
-            )
+    for datapoint in gateway.datapoints_of("climate"):
+        coordinator = gateway.coordinator_for(datapoint)
+        entities.extend(
+            [
+                WindhagerThermostatClimate(coordinator, datapoint),
+                WindhagerThermostatClimateWithoutBias(coordinator, datapoint),
+            ]
+        )
 
     async_add_entities(entities)
 
@@ -58,20 +67,20 @@ async def async_setup_entry(
 class WindhagerBaseThermostat(CoordinatorEntity, ClimateEntity):
     """Base class for Windhager thermostats."""
 
-    def __init__(self, coordinator, device_info: dict):
+    def __init__(self, coordinator, datapoint: Datapoint):
         """Initialize the thermostat."""
         super().__init__(coordinator)
         self.client = self.coordinator.client
-        self._id = device_info.get("id", "")
-        self._name = device_info.get("name", "")
-        self._prefix = device_info.get("prefix", "")
-        self._preset_modes = ["0", "1", "2", "3", "4", "5", "6", "7"]
+        self._id = datapoint.id
+        self._name = datapoint.name
+        self._prefix = datapoint.prefix
+        self.oids = datapoint.oids
         self._attr_translation_key = "windhager_climate"
         self._device_info = DeviceInfo(
-            identifiers={(DOMAIN, device_info.get("device_id", ""))},
-            name=device_info.get("device_name", ""),
+            identifiers={(DOMAIN, datapoint.device_id)},
+            name=datapoint.device_name,
             manufacturer="Windhager",
-            model=device_info.get("device_name", ""),
+            model=datapoint.device_name,
         )
 
     @property
@@ -122,23 +131,16 @@ class WindhagerBaseThermostat(CoordinatorEntity, ClimateEntity):
     @property
     def preset_modes(self) -> list[str]:
         """Return a list of available preset modes."""
-        return self._preset_modes
-
-    def get_oid_value(self, path: str, default: str = "0") -> Optional[float]:
-        """Get OID value with error handling."""
-        return get_oid_value(self.coordinator, path, self._prefix, default)
-
-    def raw_selected_mode(self) -> Optional[int]:
-        """Get raw selected mode value."""
-        return int(self.get_oid_value("/0/3/50/0") or 0)
+        return PRESET_MODES
 
-    def raw_custom_temp_remaining_time(self) -> Optional[int]:
-        """Get raw custom temperature remaining time."""
-        return int(self.get_oid_value("/0/2/10/0") or 0)
+    @property
+    def climate_state(self) -> ClimateState:
+        """Return the values of the climate function, shared with its twin."""
+        return self.coordinator.climate_state(self._prefix)
 
     def raw_preset_mode(self) -> Optional[int]:
         """Get raw preset mode."""
-        return self.raw_selected_mode()
+        return self.climate_state.selected_mode
 
     @property
     def hvac_action(self) -> str:
@@ -150,19 +152,50 @@ class WindhagerBaseThermostat(CoordinatorEntity, ClimateEntity):
     @property
     def preset_mode(self) -> Optional[str]:
         """Return the current preset mode."""
-        if self.raw_custom_temp_remaining_time() > 0:
-            return self._preset_modes[7]
+        if self.climate_state.custom_temp_remaining > 0:
+            return PRESET_MODES[7]
         mode = self.raw_preset_mode()
-        return self._preset_modes[mode] if mode is not None else None
+        return PRESET_MODES[mode] if mode is not None else None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # Reachable by the bulk service of the integration
+        climates = self.coordinator.gateway.climates
+        climates[self.entity_id] = self
+        self.async_on_remove(lambda: climates.pop(self.entity_id, None))
+
+    def writes_for(
+        self,
+        preset_mode: str | None = None,
+        temperature: float | None = None,
+        compensation: float | None = None,
+    ) -> list[tuple[str, str]]:
+        """Return the (OID, value) writes applying the given settings, in order."""
+        writes = []
+        if preset_mode is not None:
+            id_mode = PRESET_MODES.index(preset_mode)
+            writes.append((f"{self._prefix}{SELECTED_MODE}", str(id_mode)))
+            if self.climate_state.custom_temp_remaining > 0:
+                writes.append((f"{self._prefix}{CUSTOM_TEMPERATURE_DURATION}", "0"))
+        if temperature is not None:
+            writes.append((f"{self._prefix}{SET_TEMPERATURE}", str(temperature)))
+            writes.append((f"{self._prefix}{CUSTOM_TEMPERATURE_DURATION}", "400"))
+        if compensation is not None:
+            writes.append((f"{self._prefix}{COMFORT_CORRECTION}", str(compensation)))
+        return writes
+
+    async def async_write(self, writes: list[tuple[str, str]]) -> list[WriteResult]:
+        """Write OIDs of the climate function, in order."""
+        return [await self.client.update(oid, value) for oid, value in writes]
+
+    async def _async_write(self, **settings) -> None:
+        """Apply settings, then read the climate function back."""
+        results = await self.async_write(self.writes_for(**settings))
+        await self.coordinator.async_apply_writes(results, self.oids)
 
     async def async_set_preset_mode(self, preset_mode: str) -> None:
         """Set new preset mode."""
-        id_mode = self._preset_modes.index(preset_mode)
-        await self.client.update(f"{self._prefix}/0/3/50/0", str(id_mode))
-
-        if self.raw_custom_temp_remaining_time() > 0:
-            await self.client.update(f"{self._prefix}/0/2/10/0", "0")
-        await self.coordinator.async_request_refresh()
+        await self._async_write(preset_mode=preset_mode)
 
     async def async_set_temperature(self, **kwargs) -> None:
         """Set new target temperature."""
@@ -170,9 +203,7 @@ class WindhagerBaseThermostat(CoordinatorEntity, ClimateEntity):
         if temp is None:
             raise WindhagerValueError("No temperature provided")
 
-        await self.client.update(f"{self._prefix}/0/3/4/0", str(temp))
-        await self.client.update(f"{self._prefix}/0/2/10/0", "400")
-        await self.coordinator.async_request_refresh()
+        await self._async_write(temperature=temp)
 
     async def async_set_hvac_mode(self, hvac_mode: str) -> None:
         """Set new target hvac mode."""
@@ -186,47 +217,36 @@ class WindhagerThermostatClimate(WindhagerBaseThermostat):
     @property
     def current_temperature(self) -> float | None:
         """Return the current temperature."""
-        current = self.get_oid_value("/0/0/1/0")
-        bias = self.get_oid_value("/0/3/58/0")
-
-        if current is None or bias is None:
-            return None
-
-        return current - bias
+        return self.climate_state.current_corrected
 
     @property
     def target_temperature(self) -> float | None:
         """Return the temperature we try to reach."""
-        target = self.get_oid_value("/0/1/1/0")
-        bias = self.get_oid_value("/0/3/58/0")
-
-        if target is None or bias is None:
-            return None
-
-        return target - bias
+        return self.climate_state.target_corrected
 
     async def set_current_temp_compensation(self, compensation: float) -> None:
         """Set the temperature compensation value."""
-        await self.client.update(f"{self._prefix}/0/3/58/0", str(compensation))
-        await self.coordinator.async_request_refresh()
+        await self._async_write(compensation=compensation)
 
 
 class WindhagerThermostatClimateWithoutBias(WindhagerBaseThermostat):
     """Windhager climate without temperature bias."""
 
-    def __init__(self, coordinator, device_info: dict):
+    def __init__(self, coordinator, datapoint: Datapoint):
         """Initialize the thermostat."""
-        device_info = device_info.copy()
-        device_info["id"] = f"{device_info.get('id', '')}_nobias"
-        device_info["name"] = f"{device_info.get('name', '')} without bias"
-        super().__init__(coordinator, device_info)
+        datapoint = replace(
+            datapoint,
+            id=f"{datapoint.id}_nobias",
+            name=f"{datapoint.name} without bias",
+        )
+        super().__init__(coordinator, datapoint)
 
     @property
     def current_temperature(self) -> float | None:
         """Return the current temperature."""
-        return self.get_oid_value("/0/0/1/0")
+        return self.climate_state.current
 
     @property
     def target_temperature(self) -> float | None:
         """Return the temperature we try to reach."""
-        return self.get_oid_value("/0/1/1/0")
+        return self.climate_state.target
@@ -4,16 +4,47 @@ from __future__ import annotations
 
 import logging
 from typing import Any
-from urllib.parse import urlparse
 
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .const import DOMAIN
+from .const import (
+    CONF_BACKOFF,
+    CONF_BOUNDED_LOOP,
+    CONF_CALORIFIC_VALUE,
+    CONF_CYCLE_TIMEOUT,
+    CONF_EXPORT_FORMAT,
+    CONF_EXPORT_MODE,
+    CONF_EXPORT_TARGET,
+    CONF_MAX_CONCURRENCY,
+    CONF_MAX_TIMEOUTS,
+    CONF_NOMINAL_POWER,
+    CONF_PELLET_PRICE,
+    CONF_PUSH_PATH,
+    CONF_REQUEST_TIMEOUT,
+    CONF_SCAN_INTERVAL,
+    CONF_SWEEP_INTERVAL,
+    DATA_VALIDATED_CLIENTS,
+    DEFAULT_BACKOFF,
+    DEFAULT_CALORIFIC_VALUE,
+    DEFAULT_CYCLE_TIMEOUT,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_TIMEOUTS,
+    DEFAULT_REQUEST_TIMEOUT,
+    DEFAULT_SWEEP_INTERVAL,
+    DOMAIN,
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMAT_LINE,
+    EXPORT_MODE_CHANGES,
+    EXPORT_MODE_SNAPSHOT,
+    UPDATE_INTERVAL,
+)
 from .client import WindhagerHttpClient
+from .discovery import normalize_host, scan
 from .exceptions import CannotConnect, InvalidAuth
 
 _LOGGER = logging.getLogger(__name__)
@@ -25,25 +56,18 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
     }
 )
 
+STEP_DISCOVERY_DATA_SCHEMA = vol.Schema(
+    {
+        vol.Required("subnet"): str,
+        vol.Optional("port"): vol.All(vol.Coerce(int), vol.Range(min=1, max=65535)),
+        vol.Required("password"): str,
+    }
+)
+
 
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect."""
-    host = data["host"].strip().rstrip("/")
-
-    # Remove any protocol prefix and additional paths if present
-    if "://" in host:
-        parsed = urlparse(host)
-        host = parsed.netloc or parsed.path
-    else:
-        # Handle case where user just pasted a URL without protocol
-        host = host.split("/")[0]
-
-    # Remove any port number if present
-    if ":" in host:
-        host = host.split(":")[0]
-
-    # Final cleanup of any remaining slashes or spaces
-    host = host.strip("/")
+    host = normalize_host(data["host"])
 
     _LOGGER.info("Validating Windhager connection - Host: %s", host)
 
@@ -55,17 +79,21 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
 
         try:
             _LOGGER.debug("Testing connection by fetching root device info")
-            await client.fetch("/1")
+            topology = await client.fetch("/1")
             _LOGGER.info("Successfully connected to Windhager device at %s", host)
         except Exception as err:
             _LOGGER.error("Connection test failed for %s: %s", host, str(err))
-            raise CannotConnect from err
-        finally:
             await client.close()
+            raise CannotConnect from err
+
+        # The client stays open: its session, digest challenge and the
+        # fetched topology are handed over to the entry setup
+        client.topology = topology
 
         return {
             "title": f"Windhager Heater ({host})",
             "host": host,  # Return the cleaned host
+            "client": client,
         }
 
     except Exception as err:
@@ -76,16 +104,35 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for heater."""
 
-    VERSION = 1
+    VERSION = 2
+
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        self._discovered: list[str] = []
+        self._password: str | None = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Create the options flow."""
+        return OptionsFlowHandler()
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle the initial step."""
+        return self.async_show_menu(step_id="user", menu_options=["manual", "scan"])
+
+    async def async_step_manual(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle a host typed by the user."""
         if user_input is None:
             _LOGGER.debug("Showing initial config flow form")
             return self.async_show_form(
-                step_id="user", data_schema=STEP_USER_DATA_SCHEMA
+                step_id="manual", data_schema=STEP_USER_DATA_SCHEMA
             )
 
         _LOGGER.debug("Attempting to validate config for host %s", user_input["host"])
@@ -93,13 +140,9 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors = {}
 
         try:
-            info = await validate_input(self.hass, user_input)
-            # Create a new dict with cleaned host value
-            cleaned_data = {
-                "host": info["host"],  # Use the cleaned host
-                "password": user_input["password"],
-            }
-            return self.async_create_entry(title=info["title"], data=cleaned_data)
+            return await self._async_create_validated_entry(
+                user_input["host"], user_input["password"]
+            )
         except CannotConnect:
             errors["base"] = "cannot_connect"
         except InvalidAuth:
@@ -109,5 +152,180 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors["base"] = "unknown"
 
         return self.async_show_form(
-            step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
+            step_id="manual", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
+        )
+
+    async def async_step_scan(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Scan a subnet for gateways."""
+        errors = {}
+
+        if user_input is not None:
+            try:
+                found = await scan(
+                    async_get_clientsession(self.hass),
+                    user_input["subnet"].strip(),
+                    user_input.get("port"),
+                )
+            except ValueError:
+                errors["subnet"] = "invalid_subnet"
+            else:
+                configured = {
+                    entry.data["host"] for entry in self._async_current_entries()
+                }
+                self._discovered = [host for host in found if host not in configured]
+                self._password = user_input["password"]
+                if self._discovered:
+                    return await self.async_step_pick()
+                if found:
+                    return self.async_abort(reason="already_configured")
+                errors["base"] = "no_gateway_found"
+
+        return self.async_show_form(
+            step_id="scan", data_schema=STEP_DISCOVERY_DATA_SCHEMA, errors=errors
+        )
+
+    async def async_step_pick(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Let the user pick one of the discovered gateways."""
+        errors = {}
+
+        if user_input is not None:
+            try:
+                return await self._async_create_validated_entry(
+                    user_input["host"], self._password
+                )
+            except CannotConnect:
+                errors["base"] = "cannot_connect"
+            except InvalidAuth:
+                errors["base"] = "invalid_auth"
+            except Exception:
+                _LOGGER.exception("Unexpected exception")
+                errors["base"] = "unknown"
+
+        return self.async_show_form(
+            step_id="pick",
+            data_schema=vol.Schema({vol.Required("host"): vol.In(self._discovered)}),
+            errors=errors,
+        )
+
+    async def _async_create_validated_entry(
+        self, host: str, password: str
+    ) -> FlowResult:
+        """Validate the connection and create the config entry."""
+        info = await validate_input(self.hass, {"host": host, "password": password})
+        pending = self.hass.data.setdefault(DATA_VALIDATED_CLIENTS, {})
+        if (previous := pending.pop(info["host"], None)) is not None:
+            await previous.close()
+        pending[info["host"]] = info["client"]
+        # Create a new dict with cleaned host value
+        cleaned_data = {
+            "host": info["host"],  # Use the cleaned host
+            "password": password,
+        }
+        return self.async_create_entry(title=info["title"], data=cleaned_data)
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle Windhager options."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        errors = {}
+        if user_input is not None:
+            target = user_input.get(CONF_EXPORT_TARGET)
+            if target:
+                # Only loaded when an export target is configured
+                from .exporter import is_http_target
+
+                if not (
+                    is_http_target(target) or self.hass.config.is_allowed_path(target)
+                ):
+                    errors[CONF_EXPORT_TARGET] = "export_target_not_allowed"
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
+
+        # Keep what was entered when the form is shown again
+        options = user_input or self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_SCAN_INTERVAL,
+                        default=options.get(CONF_SCAN_INTERVAL, UPDATE_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+                    vol.Required(
+                        CONF_CYCLE_TIMEOUT,
+                        default=options.get(CONF_CYCLE_TIMEOUT, DEFAULT_CYCLE_TIMEOUT),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=600)),
+                    vol.Required(
+                        CONF_REQUEST_TIMEOUT,
+                        default=options.get(
+                            CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=120)),
+                    vol.Required(
+                        CONF_MAX_CONCURRENCY,
+                        default=options.get(
+                            CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+                    vol.Required(
+                        CONF_MAX_TIMEOUTS,
+                        default=options.get(CONF_MAX_TIMEOUTS, DEFAULT_MAX_TIMEOUTS),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                    vol.Required(
+                        CONF_BACKOFF,
+                        default=options.get(CONF_BACKOFF, DEFAULT_BACKOFF),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=1, max=4)),
+                    vol.Required(
+                        CONF_BOUNDED_LOOP,
+                        default=options.get(CONF_BOUNDED_LOOP, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_PUSH_PATH,
+                        description={"suggested_value": options.get(CONF_PUSH_PATH)},
+                    ): vol.Match(r"^/\S*$"),
+                    vol.Required(
+                        CONF_SWEEP_INTERVAL,
+                        default=options.get(
+                            CONF_SWEEP_INTERVAL, DEFAULT_SWEEP_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=60, max=86400)),
+                    vol.Required(
+                        CONF_CALORIFIC_VALUE,
+                        default=options.get(
+                            CONF_CALORIFIC_VALUE, DEFAULT_CALORIFIC_VALUE
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=3, max=6)),
+                    vol.Required(
+                        CONF_NOMINAL_POWER,
+                        default=options.get(CONF_NOMINAL_POWER, 0),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=500)),
+                    vol.Required(
+                        CONF_PELLET_PRICE,
+                        default=options.get(CONF_PELLET_PRICE, 0),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100000)),
+                    vol.Optional(
+                        CONF_EXPORT_TARGET,
+                        description={
+                            "suggested_value": options.get(CONF_EXPORT_TARGET)
+                        },
+                    ): str,
+                    vol.Required(
+                        CONF_EXPORT_FORMAT,
+                        default=options.get(CONF_EXPORT_FORMAT, EXPORT_FORMAT_LINE),
+                    ): vol.In([EXPORT_FORMAT_LINE, EXPORT_FORMAT_CSV]),
+                    vol.Required(
+                        CONF_EXPORT_MODE,
+                        default=options.get(CONF_EXPORT_MODE, EXPORT_MODE_CHANGES),
+                    ): vol.In([EXPORT_MODE_CHANGES, EXPORT_MODE_SNAPSHOT]),
+                }
+            ),
+            errors=errors,
         )
@@ -1,7 +1,118 @@
 """Constants for the Windhager Heater integration."""
 
+# Heater status values where the burner is running (ignition, flame
+# stabilisation, modulating)
+BURNER_ON_STATES = frozenset({6, 7, 8})
 CLIMATE_FUNCTION_TYPE = 14
+CONF_BACKOFF = "backoff"
+CONF_BOUNDED_LOOP = "bounded_loop"
+CONF_CALORIFIC_VALUE = "calorific_value"
+CONF_CYCLE_TIMEOUT = "cycle_timeout"
+CONF_EXPORT_FORMAT = "export_format"
+CONF_EXPORT_MODE = "export_mode"
+CONF_EXPORT_TARGET = "export_target"
+CONF_MAX_CONCURRENCY = "max_concurrency"
+CONF_MAX_TIMEOUTS = "max_timeouts"
+CONF_NOMINAL_POWER = "nominal_power"
+CONF_PELLET_PRICE = "pellet_price"
+CONF_PUSH_PATH = "push_path"
+CONF_REQUEST_TIMEOUT = "request_timeout"
+CONF_SCAN_INTERVAL = "scan_interval"
+CONF_SWEEP_INTERVAL = "sweep_interval"
+# Event loop time (in seconds) of a polling cycle after which its responses
+# are decoded in an executor, when the event loop usage is bounded
+CYCLE_LOOP_BUDGET = 0.002
+# hass.data key of the clients validated by the config flow, by host
+DATA_VALIDATED_CLIENTS = "windhager_validated_clients"
+# Multiplier of the poll interval after each consecutive timeout (1 = none)
+DEFAULT_BACKOFF = 1.0
+# Energy (in kWh) of a kg of wood pellets
+DEFAULT_CALORIFIC_VALUE = 4.8
+# Timeout (in seconds) of a whole polling cycle
+DEFAULT_CYCLE_TIMEOUT = 20
+# Maximum number of requests in flight to a gateway
+DEFAULT_MAX_CONCURRENCY = 3
+# Consecutive cycle timeouts before the entities become unavailable
+DEFAULT_MAX_TIMEOUTS = 3
+# Timeout (in seconds) of a single request
+DEFAULT_REQUEST_TIMEOUT = 10
+# Interval (in seconds) of the full consistency poll while a change feed is
+# followed
+DEFAULT_SWEEP_INTERVAL = 900
 DEFAULT_USERNAME = "USER"
+# Maximum number of gateway probes in flight during a subnet scan
+DISCOVERY_CONCURRENCY = 64
+DISCOVERY_MAX_HOSTS = 1024
 DOMAIN = "windhager"
+# Longest time (in seconds) between two samples the heat output is integrated
+# over, at least (twice the longest poll interval otherwise)
+ENERGY_MAX_GAP = 1800
+EVENT_HEATER_STATUS_CHANGED = "windhager_heater_status_changed"
+# Maximum number of samples waiting to be exported
+EXPORT_BUFFER_SIZE = 10000
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_LINE = "line"
+EXPORT_MODE_CHANGES = "changes"
+EXPORT_MODE_SNAPSHOT = "snapshot"
+# Interval (in seconds) of the heater status polling during transient phases
+FAST_POLL_INTERVAL = 5
+# Minimum time (in seconds) between two change feed requests; answers held
+# at least this long mean the gateway keeps the request open
+FEED_MIN_INTERVAL = 5
 HEATER_FUNCTION_TYPE = 9
+# Translation keys of the heater status values, by value
+HEATER_STATUS_OPTIONS = (
+    "burner_locked",
+    "self_test",
+    "heat_generator_off",
+    "standby",
+    "burner_off",
+    "pre_purge",
+    "ignition",
+    "flame_stabilisation",
+    "modulating",
+    "boiler_locked",
+    "delayed_standby",
+    "fan_stopped",
+    "cover_door_open",
+    "ignition_ready",
+    "ignition_aborted",
+    "preheating",
+)
+# Number of samples kept per OID (6 hours at the default interval)
+HISTORY_SIZE = 360
+# Response bodies larger than this (in bytes) are always decoded in an executor
+# when the event loop usage is bounded
+LARGE_BODY_SIZE = 16384
+# Time (in seconds) a gateway may hold a change feed request before answering
+LONG_POLL_TIMEOUT = 60
+# Upper bound (in seconds) of the poll interval when backing off
+MAX_BACKOFF_INTERVAL = 600
+# Number of "/" in a full datapoint OID (/subnet/node/function/group/member/instance)
+OID_DEPTH = 6
+# Attempts to read an OID within a cycle, and delay (in seconds) before the
+# first retry, doubled after each attempt
+OID_RETRY_ATTEMPTS = 3
+OID_RETRY_DELAY = 0.5
+# Climate preset modes, by value of the selected mode OID
+PRESET_MODES = ["0", "1", "2", "3", "4", "5", "6", "7"]
+# Timeout (in seconds) of the unauthenticated gateway probe
+PROBE_TIMEOUT = 2
+# Interval (in seconds) of the reads of a quarantined OID
+QUARANTINE_PROBE_INTERVAL = 1800
+# Consecutive failed or invalid reads before an OID is quarantined
+QUARANTINE_THRESHOLD = 3
+# Number of request and cycle traces kept while tracing
+TRACE_BUFFER_SIZE = 2000
+# Short-lived heater status values (self-test, pre-purge, ignition, flame
+# stabilisation, ignition ready, ignition abort, preheating)
+TRANSIENT_STATES = frozenset({1, 5, 6, 7, 13, 14, 15})
 UPDATE_INTERVAL = 60
+# Windows (in seconds) of the statistics computed from the history
+WINDOW_AVERAGE = 15 * 60
+WINDOW_ON_RATIO = 60 * 60
+WINDOW_RATE = 3 * 60 * 60
+# Delay (in seconds) before retrying a write, doubled after each attempt
+WRITE_RETRY_DELAY = 0.5
+# Time (in seconds) a write may take, retries included
+WRITE_TIMEOUT = 10
@@ -0,0 +1,302 @@
+"""Data update coordinator of the Windhager Heater integration."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_BACKOFF,
+    CONF_CALORIFIC_VALUE,
+    CONF_CYCLE_TIMEOUT,
+    CONF_MAX_TIMEOUTS,
+    CONF_NOMINAL_POWER,
+    CONF_PELLET_PRICE,
+    CONF_SCAN_INTERVAL,
+    CONF_SWEEP_INTERVAL,
+    DEFAULT_BACKOFF,
+    DEFAULT_CALORIFIC_VALUE,
+    DEFAULT_CYCLE_TIMEOUT,
+    DEFAULT_MAX_TIMEOUTS,
+    DEFAULT_SWEEP_INTERVAL,
+    DOMAIN,
+    ENERGY_MAX_GAP,
+    EVENT_HEATER_STATUS_CHANGED,
+    FAST_POLL_INTERVAL,
+    MAX_BACKOFF_INTERVAL,
+    UPDATE_INTERVAL,
+)
+from .energy import EnergyMeter
+from .exceptions import WindhagerError
+from .history import OidHistory
+from .models import ClimateState, WriteResult
+from .scheduler import PRIORITY_HIGH
+from .transitions import HeaterStatusTracker
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WindhagerDataUpdateCoordinator(DataUpdateCoordinator):
+    """Class to manage fetching the data of a node of a Windhager gateway."""
+
+    def __init__(self, hass, gateway, node, oids):
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN} {gateway.client.host}{node}",
+            update_interval=timedelta(seconds=UPDATE_INTERVAL),
+            # Only notify entities when a cycle actually changed something
+            always_update=False,
+        )
+        self.gateway = gateway
+        self.client = gateway.client
+        self.entry = gateway.entry
+        self.node = node
+        self.oids = frozenset(oids)
+        self.consecutive_timeouts = 0
+        self.history = OidHistory()
+        self.status_trackers: dict[str, HeaterStatusTracker] = {
+            datapoint.oid: HeaterStatusTracker(datapoint.oid, datapoint.device_id)
+            for datapoint in gateway.datapoints_of("heater_status")
+            if datapoint.oid in self.oids
+        }
+        # Energy meters of the heaters, by function prefix
+        self.energy_meters: dict[str, EnergyMeter] = {
+            datapoint.prefix: EnergyMeter(datapoint.prefix)
+            for datapoint in gateway.datapoints_of("energy")
+            if datapoint.oid in self.oids
+        }
+        self._fast_poll_unsub = None
+        self.entry.async_on_unload(self._async_cancel_fast_poll)
+        # Climate states of the current snapshot values, by function prefix
+        self._climate_states: dict[str, ClimateState] = {}
+        self._climate_states_values = None
+        self.async_apply_options()
+
+    @callback
+    def async_apply_options(self) -> None:
+        """Apply the entry options to the polling of the node."""
+        options = self.entry.options
+        self.interval = timedelta(
+            seconds=options.get(CONF_SCAN_INTERVAL, UPDATE_INTERVAL)
+        )
+        self.sweep_interval = timedelta(
+            seconds=options.get(CONF_SWEEP_INTERVAL, DEFAULT_SWEEP_INTERVAL)
+        )
+        self.update_interval = self.poll_interval
+        self.cycle_timeout = options.get(CONF_CYCLE_TIMEOUT, DEFAULT_CYCLE_TIMEOUT)
+        self.max_timeouts = options.get(CONF_MAX_TIMEOUTS, DEFAULT_MAX_TIMEOUTS)
+        self.backoff = options.get(CONF_BACKOFF, DEFAULT_BACKOFF)
+        for meter in self.energy_meters.values():
+            meter.configure(
+                calorific_value=options.get(
+                    CONF_CALORIFIC_VALUE, DEFAULT_CALORIFIC_VALUE
+                ),
+                nominal_power=options.get(CONF_NOMINAL_POWER, 0),
+                pellet_price=options.get(CONF_PELLET_PRICE, 0),
+                # Samples are as far apart as the sweeps while the feed is
+                # connected and the power factor steady
+                max_gap=max(
+                    ENERGY_MAX_GAP,
+                    2 * max(self.interval, self.sweep_interval).total_seconds(),
+                ),
+            )
+
+    def climate_state(self, prefix: str) -> ClimateState:
+        """Return the state of a climate function in the current snapshot."""
+        values = self.data.values
+        if values is not self._climate_states_values:
+            # Every update replaces the values, which resets the states
+            self._climate_states = {}
+            self._climate_states_values = values
+        state = self._climate_states.get(prefix)
+        if state is None:
+            state = self._climate_states[prefix] = ClimateState.from_values(
+                values, prefix
+            )
+        return state
+
+    @property
+    def poll_interval(self) -> timedelta:
+        """Interval of the full polls, slower while a change feed is followed."""
+        listener = self.gateway.listener
+        if listener is None:
+            return self.interval
+        return listener.poll_interval(self.interval, self.sweep_interval)
+
+    @callback
+    def async_push_values(self, values: dict) -> None:
+        """Apply the values changed since the last cycle or push."""
+        if self.data is None:
+            return
+        previous = self.data.values
+        changed = {
+            oid: value
+            for oid, value in values.items()
+            if oid in self.oids and (oid not in previous or previous[oid] != value)
+        }
+        if not changed:
+            return
+
+        self.data = data = self.data.evolve(changed)
+        # Only the changes: pushes must not fill the history with duplicates
+        self.history.record(changed)
+        self._async_meter_energy(data)
+        self._async_track_status(data)
+        self._async_export(data)
+        self.async_update_listeners()
+
+    async def async_apply_writes(
+        self, results: list[WriteResult], oids: tuple[str, ...] = ()
+    ) -> None:
+        """Apply verified writes, and read the OIDs they affect.
+
+        Replaces a full refresh after a change: only the given OIDs are read,
+        ahead of the polling. Raises if a write could not be verified.
+        """
+        values = {r.oid: r.actual for r in results if r.verified}
+        reads = [oid for oid in oids if oid not in values]
+        read_values = await asyncio.gather(
+            *(self.client.fetch_value(oid, priority=PRIORITY_HIGH) for oid in reads),
+            return_exceptions=True,
+        )
+        values.update(
+            (oid, value)
+            for oid, value in zip(reads, read_values)
+            if not isinstance(value, Exception)
+        )
+        self.async_push_values(values)
+
+        failed = [r for r in results if not r.verified]
+        if failed:
+            raise WindhagerError(
+                "Could not write " + ", ".join(f"{r.value} to {r.oid}" for r in failed)
+            )
+
+    async def _async_update_data(self):
+        """Fetch data from API endpoint."""
+        try:
+            _LOGGER.debug("Starting data update from Windhager device")
+            async with asyncio.timeout(self.cycle_timeout):
+                data = await self.client.fetch_all(
+                    deadline=time.monotonic() + self.cycle_timeout, oids=self.oids
+                )
+                if self.data is not None:
+                    # Unchanged values are shared with the previous snapshot
+                    data = self.data.evolve(data.values)
+                self.consecutive_timeouts = 0
+                self.update_interval = self.poll_interval
+                self.history.record(data.values)
+                self._async_meter_energy(data)
+                self._async_track_status(data)
+                self._async_export(data)
+                self.gateway.async_cycle_done()
+                return data
+        except asyncio.TimeoutError as err:
+            self.consecutive_timeouts += 1
+            _LOGGER.warning(
+                "Timeout fetching data from %s%s after %d seconds (attempt %d)",
+                self.client.host,
+                self.node,
+                self.cycle_timeout,
+                self.consecutive_timeouts,
+            )
+            # Give a struggling gateway some room before the next attempt
+            self.update_interval = timedelta(
+                seconds=min(
+                    self.interval.total_seconds()
+                    * self.backoff**self.consecutive_timeouts,
+                    MAX_BACKOFF_INTERVAL,
+                )
+            )
+            if self.consecutive_timeouts >= self.max_timeouts:
+                raise UpdateFailed(
+                    f"Multiple consecutive timeouts communicating with API: {err}"
+                ) from err
+            # Return last known good data if available
+            return self.data if self.data else None
+        except Exception as err:
+            _LOGGER.error(
+                "Error fetching data from %s%s: %s",
+                self.client.host,
+                self.node,
+                str(err),
+            )
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
+
+    @callback
+    def _async_export(self, data) -> None:
+        """Hand the values over to the exporter of the gateway, if any."""
+        exporter = self.gateway.exporter
+        if exporter is not None:
+            exporter.enqueue(data.values)
+            exporter.schedule_flush()
+
+    @callback
+    def _async_meter_energy(self, data) -> None:
+        """Add the energy of the heaters since the last values."""
+        now = time.monotonic()
+        for meter in self.energy_meters.values():
+            meter.update(data.values, now)
+
+    @callback
+    def _async_track_status(self, data) -> None:
+        """Fire events on heater status transitions."""
+        now = dt_util.now()
+        for oid, tracker in self.status_trackers.items():
+            event = tracker.update(data.values.get(oid), now)
+            if event is not None:
+                _LOGGER.debug("Heater status transition: %s", event)
+                self.hass.bus.async_fire(EVENT_HEATER_STATUS_CHANGED, event)
+
+        # Follow transient phases closely by polling only the status OID,
+        # unless the change feed already delivers them
+        listener = self.gateway.listener
+        if listener is not None and listener.connected:
+            return
+        if self._fast_poll_unsub is None and any(
+            tracker.transient for tracker in self.status_trackers.values()
+        ):
+            self._fast_poll_unsub = async_call_later(
+                self.hass, FAST_POLL_INTERVAL, self._async_fast_poll
+            )
+
+    async def _async_fast_poll(self, _now) -> None:
+        """Poll the heater status OIDs of heaters in a transient phase."""
+        self._fast_poll_unsub = None
+        if self.data is None:
+            return
+
+        values = {}
+        for oid, tracker in self.status_trackers.items():
+            if not tracker.transient:
+                continue
+            try:
+                values[oid] = await self.client.fetch_value(oid)
+            except Exception as err:
+                _LOGGER.debug("Fast poll of %s failed: %s", oid, str(err))
+
+        # Changes are recorded, metered and exported like pushed ones
+        data = self.data
+        self.async_push_values(values)
+        if self.data is data:
+            # Keep following the transient phase
+            self._async_track_status(data)
+
+    @callback
+    def _async_cancel_fast_poll(self) -> None:
+        """Stop the heater status fast polling."""
+        if self._fast_poll_unsub is not None:
+            self._fast_poll_unsub()
+            self._fast_poll_unsub = None
@@ -0,0 +1,35 @@
+"""Diagnostics support for the Windhager Heater integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_EXPORT_TARGET, CONF_PUSH_PATH, DOMAIN
+
+# The export target URL usually carries the credentials of the database
+TO_REDACT = {"password", CONF_EXPORT_TARGET, CONF_PUSH_PATH}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    gateway = hass.data[DOMAIN][entry.entry_id]
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "nodes": {
+            node: coordinator.last_update_success
+            for node, coordinator in gateway.coordinators.items()
+        },
+        # Last polled values; the windhager.dump_oids service reads every
+        # datapoint of the gateway, including the unmapped ones
+        "oids": gateway.values,
+        "metrics": gateway.client.metrics,
+        "quarantined_oids": sorted(gateway.client.quarantine),
+        "tracing": gateway.client.tracer.as_dict(),
+    }
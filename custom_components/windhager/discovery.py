@@ -0,0 +1,84 @@
+"""Discovery of Windhager gateways on the local network."""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import logging
+from urllib.parse import urlparse
+
+import aiohttp
+
+from .const import DISCOVERY_CONCURRENCY, DISCOVERY_MAX_HOSTS, PROBE_TIMEOUT
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def normalize_host(host: str) -> str:
+    """Strip the protocol, path and slashes from a host, keep the port."""
+    host = host.strip().rstrip("/")
+
+    # Remove any protocol prefix and additional paths if present
+    if "://" in host:
+        parsed = urlparse(host)
+        host = parsed.netloc or parsed.path
+    else:
+        # Handle case where user just pasted a URL without protocol
+        host = host.split("/")[0]
+
+    # Final cleanup of any remaining slashes or spaces
+    return host.strip("/ ")
+
+
+async def probe(
+    session: aiohttp.ClientSession, host: str, timeout: float = PROBE_TIMEOUT
+) -> bool:
+    """Check if a host looks like a Windhager gateway.
+
+    The API root answers unauthenticated requests with a digest challenge,
+    which is cheap for the gateway and needs no password.
+    """
+    try:
+        async with session.get(
+            f"http://{host}/api/1.0/lookup/1",
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            allow_redirects=False,
+        ) as response:
+            challenge = response.headers.get("www-authenticate", "")
+            return response.status == 401 and challenge.lower().startswith("digest")
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+        return False
+
+
+async def scan(
+    session: aiohttp.ClientSession,
+    network: str,
+    port: int | None = None,
+    timeout: float = PROBE_TIMEOUT,
+    concurrency: int = DISCOVERY_CONCURRENCY,
+) -> list[str]:
+    """Probe every address of an IPv4 subnet concurrently, return the gateways.
+
+    IPv6 subnets are refused: their hosts would need brackets in the URLs
+    and the unique IDs built from them.
+    """
+    subnet = ipaddress.ip_network(network, strict=False)
+    if subnet.version != 4:
+        raise ValueError(f"Subnet {network} is not an IPv4 subnet")
+    if subnet.num_addresses > DISCOVERY_MAX_HOSTS:
+        raise ValueError(f"Subnet {network} is too large to scan")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    hosts = [
+        str(address) if port is None else f"{address}:{port}"
+        for address in subnet.hosts()
+    ]
+
+    async def check(host: str) -> bool:
+        async with semaphore:
+            return await probe(session, host, timeout)
+
+    results = await asyncio.gather(*(check(host) for host in hosts))
+    found = [host for host, ok in zip(hosts, results) if ok]
+    _LOGGER.debug("Found %d Windhager gateways in %s", len(found), network)
+    return found
@@ -0,0 +1,111 @@
+"""Energy and cost of a heater, accumulated from the polled values."""
+
+from __future__ import annotations
+
+from typing import Any, Mapping, Optional
+
+from .const import DEFAULT_CALORIFIC_VALUE, ENERGY_MAX_GAP
+from .models import PELLET_TOTAL, POWER_FACTOR
+
+# Accumulated quantities, restored by their sensors after a restart
+TOTALS = ("pellet_energy", "heat_energy", "cost")
+
+
+class EnergyMeter:
+    """Integrate the pellet counter and the power factor of a heater.
+
+    Every new value only adds its delta since the previous one: the pellets
+    burnt (converted to energy and cost at the settings of that moment) and
+    the heat produced at the previous power since the previous sample.
+    """
+
+    __slots__ = (
+        "pellets_oid",
+        "power_oid",
+        "calorific_value",
+        "nominal_power",
+        "pellet_price",
+        "max_gap",
+        "totals",
+        "_pellets",
+        "_power",
+        "_restored",
+    )
+
+    def __init__(self, prefix: str) -> None:
+        self.pellets_oid = f"{prefix}{PELLET_TOTAL}"
+        self.power_oid = f"{prefix}{POWER_FACTOR}"
+        # kWh per kg of pellets, kW at a power factor of 100% (0 if unknown),
+        # price per tonne of pellets (0 if unknown)
+        self.calorific_value = DEFAULT_CALORIFIC_VALUE
+        self.nominal_power = 0.0
+        self.pellet_price = 0.0
+        # Longest time (s) between two samples the heat is integrated over
+        self.max_gap = float(ENERGY_MAX_GAP)
+        self.totals = dict.fromkeys(TOTALS, 0.0)
+        # Last pellet counter (t), and last (timestamp, power factor)
+        self._pellets: Optional[float] = None
+        self._power: Optional[tuple[float, float]] = None
+        self._restored: set[str] = set()
+
+    def configure(
+        self,
+        calorific_value: float,
+        nominal_power: float,
+        pellet_price: float,
+        max_gap: float = ENERGY_MAX_GAP,
+    ) -> None:
+        """Change the settings, applied to the next deltas only."""
+        self.calorific_value = calorific_value
+        self.nominal_power = nominal_power
+        self.pellet_price = pellet_price
+        self.max_gap = max_gap
+
+    def restore(self, quantity: str, value: float) -> None:
+        """Resume a total from its last state, once."""
+        if quantity in self.totals and quantity not in self._restored:
+            self._restored.add(quantity)
+            self.totals[quantity] += value
+
+    def update(self, values: Mapping[str, Any], timestamp: float) -> None:
+        """Add the deltas of the new values."""
+        if self.pellets_oid in values:
+            pellets = _as_float(values[self.pellets_oid])
+            if pellets is not None:
+                # A counter going backwards was reset, it is a new baseline
+                if self._pellets is not None and pellets > self._pellets:
+                    burnt = pellets - self._pellets
+                    self.totals["pellet_energy"] += burnt * 1000 * self.calorific_value
+                    self.totals["cost"] += burnt * self.pellet_price
+                self._pellets = pellets
+
+        if self.power_oid in values:
+            power = _as_float(values[self.power_oid])
+            if self._power is not None:
+                since, previous = self._power
+                elapsed = timestamp - since
+                # Heat is not estimated over gaps in the polling
+                if 0 < elapsed <= self.max_gap:
+                    self.totals["heat_energy"] += (
+                        previous / 100 * self.nominal_power * elapsed / 3600
+                    )
+            self._power = None if power is None else (timestamp, power)
+
+    def value(self, quantity: str) -> Optional[float]:
+        """Return an accumulated total, or the current heat output (kW)."""
+        if quantity == "heat_power":
+            if self._power is None or not self.nominal_power:
+                return None
+            return round(self._power[1] / 100 * self.nominal_power, 2)
+        if quantity == "heat_energy" and not self.nominal_power:
+            return None
+        if quantity == "cost" and not self.pellet_price:
+            return None
+        return round(self.totals[quantity], 3)
+
+
+def _as_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,168 @@
+"""Export of Windhager samples to a local time-series sink."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Coroutine, Optional
+
+import aiohttp
+
+from .const import EXPORT_BUFFER_SIZE, EXPORT_FORMAT_CSV, EXPORT_MODE_CHANGES
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _escape_tag(value: str) -> str:
+    return value.replace(",", "\\,").replace("=", "\\=").replace(" ", "\\ ")
+
+
+def format_line(oid: str, value: Any, timestamp: float) -> str:
+    """Format a sample as InfluxDB line protocol."""
+    try:
+        field = f"value={float(value)}"
+    except (ValueError, TypeError):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        field = f'value="{escaped}"'
+    nanoseconds = int(timestamp * 1000) * 1000000
+    return f"windhager,oid={_escape_tag(oid)} {field} {nanoseconds}"
+
+
+def format_csv(oid: str, value: Any, timestamp: float) -> str:
+    """Format a sample as a CSV row (timestamp,oid,value)."""
+    text = str(value)
+    if any(c in text for c in ',"\n'):
+        text = '"%s"' % text.replace('"', '""')
+    return f"{timestamp:.3f},{oid},{text}"
+
+
+def is_http_target(target: str) -> bool:
+    """Return whether an export target is an HTTP endpoint, not a file."""
+    return target.startswith(("http://", "https://"))
+
+
+class WindhagerExporter:
+    """Batch samples in a bounded buffer and flush them in the background.
+
+    The target is either an http(s) URL, which receives the batches as
+    POST bodies, or a local file the batches are appended to. At most one
+    flush runs at a time; while the sink is slow or down, samples pile up
+    in the buffer and the oldest ones are dropped once it is full, counted
+    in `dropped` (and in the `export_dropped` metric, if given metrics).
+    Flushes are started with `create_task`, so that the owner can track
+    and cancel them.
+    """
+
+    def __init__(
+        self,
+        target: str,
+        fmt: str,
+        mode: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        max_buffer: int = EXPORT_BUFFER_SIZE,
+        create_task: Optional[Callable[[Coroutine], asyncio.Task]] = None,
+        metrics: Optional[dict[str, Any]] = None,
+    ) -> None:
+        self.target = target
+        self.mode = mode
+        self.settings = (target, fmt, mode)
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._format = format_csv if fmt == EXPORT_FORMAT_CSV else format_line
+        self._session = session
+        self._own_session = session is None
+        self._buffer: list[str] = []
+        self._last: dict[str, Any] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._create_task = create_task
+        self._metrics = metrics
+
+    def enqueue(self, oids: dict[str, Any], timestamp: float | None = None) -> None:
+        """Buffer the samples of one cycle."""
+        if timestamp is None:
+            timestamp = time.time()
+        lines = []
+        for oid, value in oids.items():
+            if value is None:
+                continue
+            if self.mode == EXPORT_MODE_CHANGES and self._last.get(oid) == value:
+                continue
+            self._last[oid] = value
+            lines.append(self._format(oid, value, timestamp))
+        self._buffer.extend(lines)
+        self._trim()
+
+    def _trim(self) -> None:
+        overflow = len(self._buffer) - self.max_buffer
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self.dropped += overflow
+            if self._metrics is not None:
+                self._metrics["export_dropped"] = self.dropped
+            _LOGGER.warning(
+                "Export buffer full, dropped %d samples (%d in total)",
+                overflow,
+                self.dropped,
+            )
+
+    def schedule_flush(self) -> None:
+        """Start a background flush unless one is already running."""
+        if not self._buffer:
+            return
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        create_task = self._create_task or asyncio.get_running_loop().create_task
+        self._flush_task = create_task(self.flush())
+
+    async def flush(self) -> None:
+        """Send the buffered samples to the target."""
+        batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        payload = "\n".join(batch) + "\n"
+        try:
+            if is_http_target(self.target):
+                await self._post(payload)
+            else:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._append, payload
+                )
+            _LOGGER.debug("Exported %d samples to %s", len(batch), self.target)
+        except Exception as err:
+            _LOGGER.warning("Export to %s failed: %s", self.target, str(err))
+            self._requeue(batch)
+        except asyncio.CancelledError:
+            self._requeue(batch)
+            raise
+
+    def _requeue(self, batch: list[str]) -> None:
+        # Put the batch back in front of what was buffered meanwhile
+        self._buffer = batch + self._buffer
+        self._trim()
+
+    async def _post(self, payload: str) -> None:
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        async with self._session.post(
+            self.target,
+            data=payload.encode("utf-8"),
+            headers={"Content-Type": "text/plain; charset=utf-8"},
+            timeout=aiohttp.ClientTimeout(total=10),
+        ) as response:
+            response.raise_for_status()
+
+    def _append(self, payload: str) -> None:
+        with open(self.target, "a", encoding="utf-8") as file:
+            file.write(payload)
+
+    async def close(self) -> None:
+        """Wait for the running flush, flush what is left and clean up."""
+        if self._flush_task is not None:
+            # A flush cancelled with the entry keeps its batch buffered
+            await asyncio.wait([self._flush_task])
+            self._flush_task = None
+        await self.flush()
+        if self._own_session and self._session is not None:
+            await self._session.close()
+            self._session = None
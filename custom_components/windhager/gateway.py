@@ -0,0 +1,236 @@
+"""Gateway of the Windhager Heater integration."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    CONF_BOUNDED_LOOP,
+    CONF_EXPORT_FORMAT,
+    CONF_EXPORT_MODE,
+    CONF_EXPORT_TARGET,
+    CONF_MAX_CONCURRENCY,
+    CONF_PUSH_PATH,
+    CONF_REQUEST_TIMEOUT,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_REQUEST_TIMEOUT,
+    EXPORT_FORMAT_LINE,
+    EXPORT_MODE_CHANGES,
+)
+from .coordinator import WindhagerDataUpdateCoordinator
+from .models import Datapoint, datapoints_of, node_prefix
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WindhagerGateway:
+    """Coordinators of the nodes of a gateway, and what they share.
+
+    Every node (device on the gateway's bus) has its own coordinator, polling
+    and failing independently and only notifying its own entities. They share
+    the client and its request scheduler, the change feed and the exporter.
+    """
+
+    def __init__(self, hass: HomeAssistant, client, entry) -> None:
+        self.hass = hass
+        self.client = client
+        self.entry = entry
+        self.coordinators: dict[str, WindhagerDataUpdateCoordinator] = {}
+        # Climate entities, by entity ID
+        self.climates: dict = {}
+        self.exporter = None
+        self.listener = None
+        self._listener_task = None
+        self._cycle_listeners: list[CALLBACK_TYPE] = []
+
+    async def async_setup(self) -> None:
+        """Discover the nodes, and refresh each of them once."""
+        try:
+            await self.client.discover()
+        except Exception as err:
+            raise ConfigEntryNotReady(
+                f"Error discovering the devices of {self.client.host}: {err}"
+            ) from err
+
+        nodes: dict[str, list[str]] = {}
+        for oid in self.client.oids:
+            nodes.setdefault(node_prefix(oid), []).append(oid)
+        self.coordinators = {
+            node: WindhagerDataUpdateCoordinator(self.hass, self, node, oids)
+            for node, oids in sorted(nodes.items())
+        }
+        self.async_apply_options()
+
+        await asyncio.gather(
+            *(coordinator.async_refresh() for coordinator in self.coordinators.values())
+        )
+        if self.coordinators and not self.available:
+            raise ConfigEntryNotReady(f"No device of {self.client.host} answered")
+
+    @property
+    def available(self) -> bool:
+        """Return whether at least one node answered its last poll."""
+        return any(c.last_update_success for c in self.coordinators.values())
+
+    def datapoints_of(self, *types: str) -> tuple[Datapoint, ...]:
+        """Return the discovered datapoints of the given entity types."""
+        return datapoints_of(self.client.datapoints, *types)
+
+    def coordinator_for(
+        self, datapoint: Datapoint
+    ) -> WindhagerDataUpdateCoordinator | None:
+        """Return the coordinator of the node of a datapoint.
+
+        Gateway-wide datapoints (metrics) are attached to the first node.
+        """
+        oid = datapoint.oid or datapoint.prefix
+        if oid is not None:
+            return self.coordinators.get(node_prefix(oid))
+        return next(iter(self.coordinators.values()), None)
+
+    @property
+    def values(self) -> dict:
+        """Return the last values of every node."""
+        return {
+            oid: value
+            for coordinator in self.coordinators.values()
+            if coordinator.data is not None
+            for oid, value in coordinator.data.values.items()
+        }
+
+    @callback
+    def async_apply_options(self) -> None:
+        """Apply the entry options to the client, feed, export and nodes."""
+        options = self.entry.options
+        self.client.configure(
+            max_concurrency=options.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY),
+            request_timeout=options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT),
+            bounded_loop=options.get(CONF_BOUNDED_LOOP, False),
+        )
+
+        push_path = options.get(CONF_PUSH_PATH) or None
+        if push_path != (self.listener.path if self.listener else None):
+            self._async_start_listener(push_path)
+
+        export = (
+            options.get(CONF_EXPORT_TARGET),
+            options.get(CONF_EXPORT_FORMAT, EXPORT_FORMAT_LINE),
+            options.get(CONF_EXPORT_MODE, EXPORT_MODE_CHANGES),
+        )
+        if self.exporter is None or export != self.exporter.settings:
+            if self.exporter is not None:
+                self.entry.async_create_background_task(
+                    self.hass, self.exporter.close(), "windhager exporter close"
+                )
+                self.exporter = None
+            if export[0]:
+                # Only loaded when an export target is configured
+                from .exporter import WindhagerExporter, is_http_target
+
+                # Files are only written where the dump service may write
+                if is_http_target(export[0]) or self.hass.config.is_allowed_path(
+                    export[0]
+                ):
+                    self.exporter = WindhagerExporter(
+                        *export,
+                        session=async_get_clientsession(self.hass),
+                        create_task=self._async_create_export_task,
+                        metrics=self.client.metrics,
+                    )
+                else:
+                    _LOGGER.error(
+                        "Not exporting to %s, add its directory to "
+                        "allowlist_external_dirs",
+                        export[0],
+                    )
+
+        for coordinator in self.coordinators.values():
+            coordinator.async_apply_options()
+
+    @callback
+    def _async_create_export_task(self, flush) -> asyncio.Task:
+        """Run an export flush as a task of the entry, cancelled on unload."""
+        return self.entry.async_create_background_task(
+            self.hass, flush, "windhager export"
+        )
+
+    @callback
+    def _async_start_listener(self, path: str | None) -> None:
+        """Follow the change feed at the given path, if any."""
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            self._listener_task = None
+        self.listener = None
+        if path is None:
+            return
+
+        # Only loaded when a change feed is configured
+        from .listener import WindhagerPushListener
+
+        self.listener = WindhagerPushListener(
+            self.client,
+            path,
+            on_values=self._async_push_values,
+            on_state=self._async_push_state,
+        )
+        self._listener_task = self.entry.async_create_background_task(
+            self.hass, self.listener.run(), "windhager change feed"
+        )
+
+    @callback
+    def _async_push_state(self, connected: bool) -> None:
+        """Switch the nodes between full polling and consistency sweeps."""
+        _LOGGER.debug(
+            "Change feed of %s %s",
+            self.client.host,
+            "connected" if connected else "disconnected",
+        )
+        for coordinator in self.coordinators.values():
+            coordinator.update_interval = coordinator.poll_interval
+            # Catch up on the changes missed while switching, and reschedule
+            self.entry.async_create_background_task(
+                self.hass, coordinator.async_request_refresh(), "windhager resync"
+            )
+
+    @callback
+    def _async_push_values(self, values: dict) -> None:
+        """Hand the pushed values over to the coordinators of their nodes."""
+        by_node: dict[str, dict] = {}
+        for oid, value in values.items():
+            by_node.setdefault(node_prefix(oid), {})[oid] = value
+        for node, node_values in by_node.items():
+            coordinator = self.coordinators.get(node)
+            if coordinator is not None:
+                coordinator.async_push_values(node_values)
+
+    @callback
+    def async_add_cycle_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Call back after every successful node cycle, even without changes."""
+        self._cycle_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._cycle_listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_cycle_done(self) -> None:
+        """Notify the cycle listeners."""
+        for update_callback in list(self._cycle_listeners):
+            update_callback()
+
+    async def async_close(self) -> None:
+        """Stop the change feed and export, and close the client."""
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            self._listener_task = None
+        if self.exporter is not None:
+            await self.exporter.close()
+            self.exporter = None
+        await self.client.close()
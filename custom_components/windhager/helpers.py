@@ -26,7 +26,7 @@ def get_oid_value(
     """Get OID value with error handling."""
     try:
         full_path = f"{prefix}{oid}"
-        value = coordinator.data.get("oids", {}).get(full_path, default)
+        value = coordinator.data.values.get(full_path, default)
         return parse_value(value, float, full_path)
     except (ValueError, TypeError) as err:
         _LOGGER.warning("Invalid value for %s: %s", full_path, err)
@@ -0,0 +1,140 @@
+"""Fixed-size sample history for Windhager OIDs."""
+
+from __future__ import annotations
+
+import math
+import time
+from array import array
+from typing import Callable, Iterator, Optional
+
+from .const import HISTORY_SIZE
+
+
+class RingBuffer:
+    """Array-backed ring buffer of (timestamp, value) samples.
+
+    Missing values are stored as NaN so the buffer stays a flat pair of
+    float arrays regardless of what the gateway returned.
+    """
+
+    __slots__ = ("_times", "_values", "_size", "_next", "_count")
+
+    def __init__(self, size: int = HISTORY_SIZE) -> None:
+        self._size = size
+        self._times = array("d", bytes(8 * size))
+        self._values = array("d", bytes(8 * size))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, value: Optional[float]) -> None:
+        """Add a sample, overwriting the oldest one once full."""
+        self._times[self._next] = timestamp
+        self._values[self._next] = math.nan if value is None else value
+        self._next = (self._next + 1) % self._size
+        if self._count < self._size:
+            self._count += 1
+
+    def samples(self, since: float = 0.0) -> Iterator[tuple[float, float]]:
+        """Yield valid samples newer than `since`, oldest first."""
+        start = (self._next - self._count) % self._size
+        for i in range(self._count):
+            idx = (start + i) % self._size
+            timestamp = self._times[idx]
+            value = self._values[idx]
+            if timestamp >= since and not math.isnan(value):
+                yield timestamp, value
+
+    def last(self) -> Optional[float]:
+        """Return the most recent value, if any."""
+        if self._count == 0:
+            return None
+        value = self._values[(self._next - 1) % self._size]
+        return None if math.isnan(value) else value
+
+
+class OidHistory:
+    """Ring buffers of recent samples, one per OID."""
+
+    def __init__(self, size: int = HISTORY_SIZE) -> None:
+        self._size = size
+        self._buffers: dict[str, RingBuffer] = {}
+
+    def record(self, oids: dict, timestamp: float | None = None) -> None:
+        """Append one sample per OID from a coordinator snapshot."""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        for oid, value in oids.items():
+            buffer = self._buffers.get(oid)
+            if buffer is None:
+                buffer = self._buffers[oid] = RingBuffer(self._size)
+            try:
+                buffer.append(timestamp, None if value is None else float(value))
+            except (ValueError, TypeError):
+                buffer.append(timestamp, None)
+
+    def get(self, oid: str) -> RingBuffer | None:
+        """Return the buffer of an OID."""
+        return self._buffers.get(oid)
+
+    def _window(self, oid: str, window: float) -> list[tuple[float, float]]:
+        buffer = self._buffers.get(oid)
+        if buffer is None:
+            return []
+        return list(buffer.samples(time.monotonic() - window))
+
+    def mean(self, oid: str, window: float) -> Optional[float]:
+        """Return the mean of the samples within the window.
+
+        Each sample is weighted by the time until the next sample, so that
+        pushed changes do not count more than polled values.
+        """
+        samples = self._window(oid, window)
+        if not samples:
+            return None
+        elapsed = samples[-1][0] - samples[0][0]
+        if elapsed <= 0:
+            return samples[-1][1]
+        weighted = sum(
+            previous[1] * (current[0] - previous[0])
+            for previous, current in zip(samples, samples[1:])
+        )
+        return weighted / elapsed
+
+    def rate(self, oid: str, window: float) -> Optional[float]:
+        """Return the increase per hour of a counter within the window.
+
+        Counter resets (negative deltas) are ignored.
+        """
+        samples = self._window(oid, window)
+        if len(samples) < 2:
+            return None
+        elapsed = samples[-1][0] - samples[0][0]
+        if elapsed <= 0:
+            return None
+        increase = sum(
+            max(0.0, current[1] - previous[1])
+            for previous, current in zip(samples, samples[1:])
+        )
+        return increase * 3600 / elapsed
+
+    def ratio(
+        self, oid: str, window: float, predicate: Callable[[float], bool]
+    ) -> Optional[float]:
+        """Return the share of time the predicate held within the window.
+
+        Each sample is weighted by the time until the next sample.
+        """
+        samples = self._window(oid, window)
+        if len(samples) < 2:
+            return None
+        matched = 0.0
+        for previous, current in zip(samples, samples[1:]):
+            if predicate(previous[1]):
+                matched += current[0] - previous[0]
+        elapsed = samples[-1][0] - samples[0][0]
+        if elapsed <= 0:
+            return None
+        return matched / elapsed
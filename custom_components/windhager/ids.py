@@ -0,0 +1,50 @@
+"""Unique IDs of the devices and entities of a Windhager gateway."""
+
+from __future__ import annotations
+
+# "." and "/" of hosts and OIDs both become "-"
+_SLUG = str.maketrans("./", "--")
+
+
+def slugify(identifier: str) -> str:
+    """Return an identifier without dots or slashes."""
+    return identifier.translate(_SLUG)
+
+
+class IdFactory:
+    """Build the IDs of a gateway's devices and entities, once each.
+
+    Every ID is the slug of the gateway host followed by a path: the node
+    prefix (/1/60) for devices, nothing for the gateway itself, and the OID
+    (or function prefix) with an optional suffix for entities. IDs are kept,
+    so that rediscovering the same topology builds no new string.
+    """
+
+    __slots__ = ("host", "_ids")
+
+    def __init__(self, host: str) -> None:
+        self.host = host
+        self._ids: dict[str, str] = {}
+
+    def unique_id(self, path: str) -> str:
+        """Return the unique ID of an entity, e.g. of /1/60/1/0/9/0."""
+        unique_id = self._ids.get(path)
+        if unique_id is None:
+            unique_id = self._ids[path] = slugify(f"{self.host}{path}")
+        return unique_id
+
+    def device_id(self, prefix: str = "") -> str:
+        """Return the ID of a node (by its prefix /1/60), or of the gateway."""
+        return self.unique_id(prefix)
+
+    def legacy_node(self, device_id: str) -> str | None:
+        """Return the node prefix of a device ID of the former sensor scheme.
+
+        Sensors used to join the host and the node ID without a separator
+        (192-168-1-560 for node 60), while climates used the node prefix.
+        """
+        host = slugify(self.host)
+        node = device_id.removeprefix(host)
+        if node != device_id and node.isdigit():
+            return f"/1/{node}"
+        return None
@@ -0,0 +1,105 @@
+"""Change feed listener of the Windhager Heater integration."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from datetime import timedelta
+from typing import Callable, Optional
+
+import aiohttp
+
+from .const import FEED_MIN_INTERVAL, MAX_BACKOFF_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+# Answers of a gateway without a change feed at the configured path
+UNSUPPORTED_STATUSES = frozenset({404, 405, 501})
+
+
+class WindhagerPushListener:
+    """Follow the change feed of a gateway and hand the changed values over."""
+
+    def __init__(
+        self,
+        client,
+        path: str,
+        on_values: Callable[[dict], None],
+        on_state: Optional[Callable[[bool], None]] = None,
+    ) -> None:
+        self.client = client
+        self.path = path
+        self.on_values = on_values
+        self.on_state = on_state
+        # None until the gateway answered the feed once
+        self.supported: Optional[bool] = None
+        self.connected = False
+        self.cursor = None
+        self.failures = 0
+
+    def poll_interval(
+        self, interval: timedelta, sweep_interval: timedelta
+    ) -> timedelta:
+        """Return the interval of the full polls, the sweeps while connected."""
+        return max(interval, sweep_interval) if self.connected else interval
+
+    def _set_connected(self, connected: bool) -> None:
+        if connected != self.connected:
+            self.connected = connected
+            if self.on_state is not None:
+                self.on_state(connected)
+
+    async def run(self) -> None:
+        """Listen until cancelled, or until the feed turns out unsupported."""
+        while True:
+            start = time.monotonic()
+            try:
+                values, self.cursor = await self.client.poll_changes(
+                    self.path, self.cursor
+                )
+            except asyncio.CancelledError:
+                raise
+            except aiohttp.ClientResponseError as err:
+                if err.status in UNSUPPORTED_STATUSES:
+                    _LOGGER.warning(
+                        "No change feed at %s on %s, polling only",
+                        self.path,
+                        self.client.host,
+                    )
+                    self.supported = False
+                    self._set_connected(False)
+                    return
+                await self._async_retry(err)
+                continue
+            except Exception as err:
+                await self._async_retry(err)
+                continue
+
+            self.supported = True
+            self.failures = 0
+            elapsed = time.monotonic() - start
+            if elapsed >= FEED_MIN_INTERVAL or self.cursor is not None:
+                self._set_connected(True)
+            elif not values:
+                # Answered at once with nothing: the request is not held open,
+                # this is no change feed to rely on
+                self._set_connected(False)
+            if values:
+                self.on_values(values)
+            if elapsed < FEED_MIN_INTERVAL:
+                await asyncio.sleep(FEED_MIN_INTERVAL - elapsed)
+
+    async def _async_retry(self, err: Exception) -> None:
+        """Wait before reconnecting, longer after each failure."""
+        self._set_connected(False)
+        self.failures += 1
+        delay = min(2**self.failures, MAX_BACKOFF_INTERVAL) * random.uniform(0.5, 1)
+        _LOGGER.debug(
+            "Change feed of %s failed (%s), reconnecting in %.1f s",
+            self.client.host,
+            str(err),
+            delay,
+        )
+        await asyncio.sleep(delay)
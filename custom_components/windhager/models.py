@@ -0,0 +1,229 @@
+"""Typed models of the Windhager API."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional
+
+from .helpers import parse_value
+
+# OIDs of a climate function, relative to the function prefix (/1/node/fct)
+OUTSIDE_TEMPERATURE = "/0/0/0"
+CURRENT_TEMPERATURE = "/0/1/0"
+TARGET_TEMPERATURE = "/1/1/0"
+CUSTOM_TEMPERATURE_DURATION = "/2/10/0"
+SET_TEMPERATURE = "/3/4/0"
+TEMPERATURE_CORRECTION = "/3/7/0"
+SELECTED_MODE = "/3/50/0"
+COMFORT_CORRECTION = "/3/58/0"
+
+# OIDs of a heater function, relative to the function prefix
+POWER_FACTOR = "/0/9/0"
+PELLET_TOTAL = "/23/103/0"
+
+
+@dataclass(slots=True, frozen=True)
+class Function:
+    """Function (climate circuit, heater...) of a device."""
+
+    fct_id: int
+    fct_type: int
+    name: str
+    lock: bool
+
+    @classmethod
+    def from_json(cls, json: dict[str, Any]) -> Function:
+        return cls(
+            fct_id=json["fctId"],
+            fct_type=json["fctType"],
+            name=json.get("name", ""),
+            lock=json.get("lock", False),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class Device:
+    """Device (node) on the gateway's bus."""
+
+    node_id: int
+    functions: tuple[Function, ...]
+
+    @classmethod
+    def from_json(cls, json: dict[str, Any]) -> Device:
+        return cls(
+            node_id=json["nodeId"],
+            functions=tuple(Function.from_json(f) for f in json.get("functions", [])),
+        )
+
+    @property
+    def prefix(self) -> str:
+        """OID prefix of the device."""
+        return f"/1/{self.node_id}"
+
+    def functions_of_type(self, fct_type: int) -> tuple[Function, ...]:
+        """Return the unlocked functions of a given type."""
+        return tuple(
+            f for f in self.functions if f.fct_type == fct_type and f.lock is False
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class Datapoint:
+    """Entity exposing a datapoint, or a value derived from datapoints."""
+
+    id: str
+    name: str
+    type: str
+    device_id: str
+    device_name: str
+    oid: Optional[str] = None
+    # Climate controls and bias-corrected sensors: OID prefix of the climate
+    # function, and the OIDs the controls use
+    prefix: Optional[str] = None
+    oids: tuple[str, ...] = ()
+    correction_oid: Optional[str] = None
+    device_class: Optional[str] = None
+    state_class: Optional[str] = None
+    unit: Optional[str] = None
+    # Derived values
+    statistic: Optional[str] = None
+    scale: float = 1
+    metric: Optional[str] = None
+    # Energy, heat output or cost accumulated by the heater's energy meter
+    quantity: Optional[str] = None
+
+
+@dataclass(slots=True, frozen=True)
+class ClimateState:
+    """Values of a climate function, parsed once per snapshot.
+
+    Shared by the climate entities and the bias-corrected sensors of the
+    function.
+    """
+
+    prefix: str
+    current: Optional[float]
+    target: Optional[float]
+    bias: Optional[float]
+    selected_mode: int
+    custom_temp_remaining: int
+    current_corrected: Optional[float]
+    target_corrected: Optional[float]
+
+    @classmethod
+    def from_values(cls, values: dict[str, Any], prefix: str) -> ClimateState:
+        def value(oid: str) -> Optional[float]:
+            oid = f"{prefix}{oid}"
+            return parse_value(values.get(oid, "0"), float, oid)
+
+        current = value(CURRENT_TEMPERATURE)
+        target = value(TARGET_TEMPERATURE)
+        bias = value(COMFORT_CORRECTION)
+        return cls(
+            prefix=prefix,
+            current=current,
+            target=target,
+            bias=bias,
+            selected_mode=int(value(SELECTED_MODE) or 0),
+            custom_temp_remaining=int(value(CUSTOM_TEMPERATURE_DURATION) or 0),
+            current_corrected=None
+            if current is None or bias is None
+            else current - bias,
+            target_corrected=None if target is None or bias is None else target - bias,
+        )
+
+    def corrected(self, oid: str) -> Optional[float]:
+        """Return the bias-corrected value of the current or target OID."""
+        if oid == f"{self.prefix}{CURRENT_TEMPERATURE}":
+            return self.current_corrected
+        if oid == f"{self.prefix}{TARGET_TEMPERATURE}":
+            return self.target_corrected
+        return None
+
+
+@dataclass(slots=True, frozen=True)
+class WriteResult:
+    """Outcome of a datapoint write."""
+
+    oid: str
+    value: str
+    # Whether the gateway reported the written value back
+    verified: bool
+    attempts: int
+    # Value reported by the gateway after the last attempt
+    actual: Optional[str] = None
+    error: Optional[str] = None
+
+
+def same_value(expected: Any, actual: Any) -> bool:
+    """Return whether a value read back matches a written one.
+
+    Numbers are compared as numbers, the gateway may format them differently.
+    """
+    if actual is None:
+        return False
+    try:
+        return abs(float(expected) - float(actual)) < 1e-6
+    except (TypeError, ValueError):
+        return str(expected) == str(actual)
+
+
+def node_prefix(oid: str) -> str:
+    """Return the prefix (/1/node) of the node an OID belongs to."""
+    return "/".join(oid.split("/", 3)[:3])
+
+
+def group_by_type(
+    datapoints: Iterable[Datapoint],
+) -> Mapping[str, tuple[Datapoint, ...]]:
+    """Index datapoints by entity type, in a read-only mapping."""
+    grouped: dict[str, list[Datapoint]] = {}
+    for datapoint in datapoints:
+        grouped.setdefault(datapoint.type, []).append(datapoint)
+    return MappingProxyType({key: tuple(value) for key, value in grouped.items()})
+
+
+def datapoints_of(
+    grouped: Mapping[str, tuple[Datapoint, ...]], *types: str
+) -> tuple[Datapoint, ...]:
+    """Return the datapoints of the given entity types."""
+    if len(types) == 1:
+        return grouped.get(types[0], ())
+    return tuple(d for t in types for d in grouped.get(t, ()))
+
+
+@dataclass(slots=True, frozen=True)
+class Snapshot:
+    """State of a gateway, or of one of its nodes, after a polling cycle.
+
+    Snapshots are immutable. The devices and datapoints are discovered once
+    and referenced by every snapshot, and `evolve` keeps the previous
+    snapshot when no value changed.
+    """
+
+    devices: tuple[Device, ...]
+    datapoints: Mapping[str, tuple[Datapoint, ...]]
+    values: Mapping[str, Any]
+
+    def datapoints_of(self, *types: str) -> tuple[Datapoint, ...]:
+        """Return the datapoints of the given entity types."""
+        return datapoints_of(self.datapoints, *types)
+
+    def evolve(self, values: Mapping[str, Any]) -> Snapshot:
+        """Return a snapshot with new values, or this one if none changed.
+
+        A new snapshot holds a copy of the values, whose objects are the
+        ones of the client's cache when unchanged.
+        """
+        current = self.values
+        changed = {
+            oid: value
+            for oid, value in values.items()
+            if oid not in current or current[oid] != value
+        }
+        if not changed:
+            return self
+        return Snapshot(
+            self.devices, self.datapoints, MappingProxyType({**current, **changed})
+        )
@@ -0,0 +1,76 @@
+"""Request scheduler of the Windhager client."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+# Interactive reads and writes, served first
+PRIORITY_HIGH = 0
+# Background polling
+PRIORITY_LOW = 1
+
+
+class PriorityScheduler:
+    """Cap the requests in flight, granting free slots by priority.
+
+    Requests of the same priority are served in arrival order. Polls are
+    made of many short requests, each taking its own slot, so a running
+    poll yields to interactive requests between two of its requests.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    def resize(self, capacity: int) -> None:
+        """Change the number of slots, requests in flight are not interrupted."""
+        self.capacity = capacity
+        self._wake()
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting for a slot."""
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_LOW) -> AsyncIterator[None]:
+        """Hold a slot for the duration of a request."""
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._wake()
+
+    async def _acquire(self, priority: int) -> None:
+        if self.active < self.capacity and not self._waiters:
+            self.active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted as the waiter got cancelled
+                self.active -= 1
+                self._wake()
+            else:
+                self._waiters = [w for w in self._waiters if w[2] is not future]
+                heapq.heapify(self._waiters)
+            raise
+
+    def _wake(self) -> None:
+        """Grant the free slots to the waiters of highest priority."""
+        while self._waiters and self.active < self.capacity:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
@@ -5,6 +5,7 @@ import logging
 from typing import Any
 
 from homeassistant.const import (
+    EntityCategory,
     UnitOfTemperature,
 )
 from homeassistant.helpers.device_registry import DeviceInfo
@@ -13,14 +14,26 @@ from homeassistant.helpers.update_coordinator import (
 )
 
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorEntity,
     SensorDeviceClass,
+    SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
 
 from . import DOMAIN
+from .const import (
+    BURNER_ON_STATES,
+    HEATER_STATUS_OPTIONS,
+    WINDOW_AVERAGE,
+    WINDOW_ON_RATIO,
+    WINDOW_RATE,
+)
+from .energy import TOTALS
 from .helpers import parse_value, get_oid_value
+from .models import Datapoint
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -29,26 +42,14 @@ async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities
 ) -> None:
     """Set up WindHager lights from a config entry."""
-    data_coordinator = hass.data[DOMAIN][entry.entry_id]
-
-    entities = []
-
-    for deviceInfo in data_coordinator.data.get("devices"):
-        if deviceInfo.get("type") == "temperature":
-            entity = WindhagerTemperatureSensor(data_coordinator, deviceInfo)
-            entities.append(entity)
-        elif deviceInfo.get("type") == "sensor":
-            entity = WindhagerGenericSensor(data_coordinator, deviceInfo)
-            entities.append(entity)
-        elif deviceInfo.get("type") == "select":
-            entity = WindhagerSelectSensor(data_coordinator, deviceInfo)
-            entities.append(entity)
-        elif (
-            deviceInfo.get("type") == "total"
-            or deviceInfo.get("type") == "total_increasing"
-        ):
-            entity = WindhagerPelletSensor(data_coordinator, deviceInfo)
-            entities.append(entity)
+    gateway = hass.data[DOMAIN][entry.entry_id]
+
+    entities = [
+        entity_class(coordinator, datapoint)
+        for entity_class, types in SENSOR_TYPES
+        for datapoint in gateway.datapoints_of(*types)
+        if (coordinator := gateway.coordinator_for(datapoint)) is not None
+    ]
 
     async_add_entities(entities)
 
@@ -56,17 +57,17 @@ async def async_setup_entry(
 class WindhagerBaseSensor(CoordinatorEntity, SensorEntity):
     """Base class for Windhager sensors."""
 
-    def __init__(self, coordinator: Any, device_info: dict) -> None:
+    def __init__(self, coordinator: Any, datapoint: Datapoint) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
-        self._id = device_info.get("id")
-        self._name = device_info.get("name")
-        self._oid = device_info.get("oid")
+        self._id = datapoint.id
+        self._name = datapoint.name
+        self._oid = datapoint.oid
         self._device_info = DeviceInfo(
-            identifiers={(DOMAIN, device_info.get("device_id"))},
-            name=device_info.get("device_name"),
+            identifiers={(DOMAIN, datapoint.device_id)},
+            name=datapoint.device_name,
             manufacturer="Windhager",
-            model=device_info.get("device_name"),
+            model=datapoint.device_name,
         )
 
     @property
@@ -92,9 +93,10 @@ class WindhagerBaseSensor(CoordinatorEntity, SensorEntity):
 class WindhagerTemperatureSensor(WindhagerBaseSensor):
     """Temperature sensor implementation."""
 
-    def __init__(self, coordinator: Any, device_info: dict) -> None:
-        super().__init__(coordinator, device_info)
-        self._correction_oid = device_info.get("correction_oid")
+    def __init__(self, coordinator: Any, datapoint: Datapoint) -> None:
+        super().__init__(coordinator, datapoint)
+        # Climate function computing the bias-corrected value, if any
+        self._prefix = datapoint.prefix if datapoint.correction_oid else None
 
     @property
     def device_class(self) -> SensorDeviceClass:
@@ -107,27 +109,22 @@ class WindhagerTemperatureSensor(WindhagerBaseSensor):
 
     @property
     def native_value(self) -> float | None:
-        value = self._get_oid_value()
-
-        if value is None:
-            return None
-
-        if self._correction_oid is not None:
-            correction = self._get_oid_value(self._correction_oid)
-            if correction is not None:
-                value -= correction
+        if self._prefix is not None:
+            state = self.coordinator.climate_state(self._prefix)
+            if state.bias is not None:
+                return state.corrected(self._oid)
 
-        return value
+        return self._get_oid_value()
 
 
 class WindhagerGenericSensor(WindhagerBaseSensor):
     """Generic sensor implementation."""
 
-    def __init__(self, coordinator: Any, device_info: dict) -> None:
-        super().__init__(coordinator, device_info)
-        self._device_class = device_info.get("device_class")
-        self._state_class = device_info.get("state_class")
-        self._unit = device_info.get("unit")
+    def __init__(self, coordinator: Any, datapoint: Datapoint) -> None:
+        super().__init__(coordinator, datapoint)
+        self._device_class = datapoint.device_class
+        self._state_class = datapoint.state_class
+        self._unit = datapoint.unit
 
     @property
     def device_class(self) -> str | None:
@@ -149,9 +146,9 @@ class WindhagerGenericSensor(WindhagerBaseSensor):
 class WindhagerPelletSensor(WindhagerBaseSensor):
     """Pellet sensor implementation."""
 
-    def __init__(self, coordinator: Any, device_info: dict) -> None:
-        super().__init__(coordinator, device_info)
-        self._state_class = device_info.get("type")
+    def __init__(self, coordinator: Any, datapoint: Datapoint) -> None:
+        super().__init__(coordinator, datapoint)
+        self._state_class = datapoint.type
 
     @property
     def state_class(self) -> str | None:
@@ -166,12 +163,12 @@ class WindhagerPelletSensor(WindhagerBaseSensor):
         return "t"
 
 
-class WindhagerSelectSensor(WindhagerBaseSensor):
-    """Select sensor implementation."""
+class WindhagerHeaterStatusSensor(WindhagerBaseSensor):
+    """Heater status sensor, translated through the options of the enum."""
 
-    def __init__(self, coordinator: Any, device_info: dict) -> None:
-        super().__init__(coordinator, device_info)
-        self._options = device_info.get("options")
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = list(HEATER_STATUS_OPTIONS)
+    _attr_translation_key = "heater_status"
 
     @property
     def raw_value(self) -> int | None:
@@ -179,16 +176,178 @@ class WindhagerSelectSensor(WindhagerBaseSensor):
 
     @property
     def native_value(self) -> str | None:
-        # TODO use translations to return the correct text for each language (e.g. "1" -> "Self-test"/"Autotest"...); remove the options value in client.py
         raw_value = self.raw_value
         if raw_value is None:
             return None
-        if not (0 <= raw_value < len(self._options)):
+        if not (0 <= raw_value < len(HEATER_STATUS_OPTIONS)):
             _LOGGER.debug(
                 "Invalid status value %s for sensor %s. Must be between 0 and %d",
                 raw_value,
                 self._name,
-                len(self._options) - 1,
+                len(HEATER_STATUS_OPTIONS) - 1,
+            )
+            return None
+        return HEATER_STATUS_OPTIONS[raw_value]
+
+
+class WindhagerStatisticSensor(WindhagerBaseSensor):
+    """Sensor derived from the coordinator's local sample history."""
+
+    def __init__(self, coordinator: Any, datapoint: Datapoint) -> None:
+        super().__init__(coordinator, datapoint)
+        self._statistic = datapoint.statistic
+        self._device_class = datapoint.device_class
+        self._unit = datapoint.unit
+        self._scale = datapoint.scale
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # The windows move on even when no polled value changed
+        self.async_on_remove(
+            self.coordinator.gateway.async_add_cycle_listener(self.async_write_ha_state)
+        )
+
+    @property
+    def device_class(self) -> str | None:
+        return self._device_class
+
+    @property
+    def state_class(self) -> str:
+        return SensorStateClass.MEASUREMENT
+
+    @property
+    def native_unit_of_measurement(self) -> str | None:
+        return self._unit
+
+    @property
+    def native_value(self) -> float | None:
+        history = self.coordinator.history
+        if self._statistic == "rate":
+            value = history.rate(self._oid, WINDOW_RATE)
+        elif self._statistic == "on_ratio":
+            value = history.ratio(
+                self._oid, WINDOW_ON_RATIO, lambda v: int(v) in BURNER_ON_STATES
             )
+        elif self._statistic == "mean":
+            value = history.mean(self._oid, WINDOW_AVERAGE)
+        else:
+            return None
+
+        if value is None:
+            return None
+        return round(value * self._scale, 2)
+
+
+class WindhagerCyclesSensor(WindhagerBaseSensor, RestoreSensor):
+    """Number of burner starts since midnight.
+
+    The count of the day is resumed after a restart.
+    """
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # Midnight resets the count even when the status did not change
+        self.async_on_remove(
+            self.coordinator.gateway.async_add_cycle_listener(self.async_write_ha_state)
+        )
+        tracker = self.coordinator.status_trackers.get(self._oid)
+        last_state = await self.async_get_last_state()
+        last = await self.async_get_last_sensor_data()
+        if tracker is None or last_state is None or last is None:
+            return
+        day = dt_util.as_local(last_state.last_updated).date()
+        cycles = parse_value(last.native_value, int, self._oid)
+        if cycles is not None and day == dt_util.now().date():
+            tracker.restore(cycles, day)
+
+    @property
+    def state_class(self) -> str:
+        return SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def native_value(self) -> int | None:
+        tracker = self.coordinator.status_trackers.get(self._oid)
+        if tracker is None:
+            return None
+        return tracker.cycles_today
+
+
+class WindhagerEnergySensor(WindhagerBaseSensor, RestoreSensor):
+    """Energy, heat output or cost accumulated by the heater's energy meter.
+
+    The totals are resumed from their last state after a restart.
+    """
+
+    def __init__(self, coordinator: Any, datapoint: Datapoint) -> None:
+        super().__init__(coordinator, datapoint)
+        self._prefix = datapoint.prefix
+        self._quantity = datapoint.quantity
+        self._attr_device_class = datapoint.device_class
+        self._attr_state_class = datapoint.state_class
+        self._attr_native_unit_of_measurement = datapoint.unit
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # The heat energy grows even when no polled value changed
+        self.async_on_remove(
+            self.coordinator.gateway.async_add_cycle_listener(self.async_write_ha_state)
+        )
+        if self._attr_device_class == SensorDeviceClass.MONETARY:
+            self._attr_native_unit_of_measurement = self.hass.config.currency
+        if self._quantity in TOTALS and (meter := self._meter) is not None:
+            last = await self.async_get_last_sensor_data()
+            if last is not None and last.native_value is not None:
+                value = parse_value(last.native_value, float, self._oid)
+                if value is not None:
+                    meter.restore(self._quantity, value)
+
+    @property
+    def _meter(self):
+        return self.coordinator.energy_meters.get(self._prefix)
+
+    @property
+    def native_value(self) -> float | None:
+        meter = self._meter
+        if meter is None:
             return None
-        return self._options[raw_value]
+        return meter.value(self._quantity)
+
+
+class WindhagerMetricSensor(WindhagerBaseSensor):
+    """Client health metric, refreshed after every node polling cycle."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator: Any, datapoint: Datapoint) -> None:
+        super().__init__(coordinator, datapoint)
+        self._metric = datapoint.metric
+        self._attr_native_unit_of_measurement = datapoint.unit
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.gateway.async_add_cycle_listener(self.async_write_ha_state)
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return whether any node of the gateway answers."""
+        return self.coordinator.gateway.available
+
+    @property
+    def native_value(self) -> float | None:
+        return self.coordinator.client.metrics.get(self._metric)
+
+
+# Entity class of each datapoint type
+SENSOR_TYPES = (
+    (WindhagerTemperatureSensor, ("temperature",)),
+    (WindhagerGenericSensor, ("sensor",)),
+    (WindhagerHeaterStatusSensor, ("heater_status",)),
+    (WindhagerPelletSensor, ("total", "total_increasing")),
+    (WindhagerMetricSensor, ("metric",)),
+    (WindhagerCyclesSensor, ("cycles",)),
+    (WindhagerStatisticSensor, ("statistic",)),
+    (WindhagerEnergySensor, ("energy",)),
+)
@@ -0,0 +1,219 @@
+"""Services for the Windhager Heater integration."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+from .const import DOMAIN, PRESET_MODES
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_DUMP_OIDS = "dump_oids"
+SERVICE_SET_CLIMATES = "set_climates"
+SERVICE_SET_CURRENT_TEMP_COMPENSATION = "set_current_temp_compensation"
+SERVICE_SET_TRACING = "set_tracing"
+
+# Directory of the dump files, relative to the configuration directory (not
+# www, which Home Assistant serves without authentication)
+DUMP_DIRECTORY = DOMAIN
+
+# Thermostat bias, in K
+COMPENSATION = vol.All(vol.Coerce(float), vol.Range(min=-3.5, max=3.5))
+
+DUMP_OIDS_SCHEMA = vol.Schema(
+    {
+        vol.Optional("config_entry_id"): cv.string,
+        vol.Optional("path", default="/1"): vol.Match(r"^(/\d+)+/?$"),
+        vol.Optional("filename"): cv.string,
+    }
+)
+
+SET_CURRENT_TEMP_COMPENSATION_SCHEMA = {
+    vol.Required("compensation"): COMPENSATION,
+}
+
+SET_CLIMATES_SCHEMA = vol.Schema(
+    {
+        vol.Required("targets"): vol.All(
+            cv.ensure_list,
+            [
+                vol.All(
+                    {
+                        vol.Required("entity_id"): cv.entity_id,
+                        # A temperature starts a custom temperature period,
+                        # which would override the preset
+                        vol.Exclusive("preset_mode", "setpoint"): vol.In(PRESET_MODES),
+                        vol.Exclusive("temperature", "setpoint"): vol.Coerce(float),
+                        vol.Optional("compensation"): COMPENSATION,
+                    },
+                    cv.has_at_least_one_key(
+                        "preset_mode", "temperature", "compensation"
+                    ),
+                )
+            ],
+        ),
+    }
+)
+
+
+SET_TRACING_SCHEMA = vol.Schema(
+    {
+        vol.Optional("config_entry_id"): cv.string,
+        vol.Required("enabled"): cv.boolean,
+    }
+)
+
+
+def _get_gateways(hass: HomeAssistant, call: ServiceCall) -> list:
+    """Return the gateways targeted by a service call."""
+    gateways = hass.data.get(DOMAIN, {})
+    entry_id = call.data.get("config_entry_id")
+    if entry_id is None:
+        return list(gateways.values())
+    if entry_id not in gateways:
+        raise ServiceValidationError(f"Unknown Windhager config entry {entry_id}")
+    return [gateways[entry_id]]
+
+
+async def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Windhager services.
+
+    The climate entity service is registered by the climate platform.
+    """
+
+    async def dump_oids(call: ServiceCall) -> ServiceResponse:
+        """Walk a lookup subtree and return or save every value found."""
+        path = None
+        if "filename" in call.data:
+            path = hass.config.path(DUMP_DIRECTORY, call.data["filename"])
+            if not hass.config.is_allowed_path(path):
+                raise ServiceValidationError(
+                    f"Writing to {path} is not allowed, "
+                    "add its directory to allowlist_external_dirs"
+                )
+
+        snapshots = {}
+        for gateway in _get_gateways(hass, call):
+            snapshot = await gateway.client.walk(call.data["path"])
+            _LOGGER.info(
+                "Read %d OIDs below %s on %s",
+                len(snapshot["values"]),
+                call.data["path"],
+                gateway.client.host,
+            )
+            snapshots[gateway.entry.entry_id] = snapshot
+
+        if path is not None:
+            await hass.async_add_executor_job(_write_json, path, snapshots)
+
+        return snapshots if call.return_response else None
+
+    async def set_climates(call: ServiceCall) -> ServiceResponse:
+        """Apply settings to many climates, then read each of them back once."""
+        gateways = hass.data.get(DOMAIN, {}).values()
+        targets = []
+        # Climate functions targeted, to refuse concurrent writes to the same OIDs
+        functions: dict[tuple[str, ...], str] = {}
+        for target in call.data["targets"]:
+            entity_id = target["entity_id"]
+            entity = next(
+                (g.climates[entity_id] for g in gateways if entity_id in g.climates),
+                None,
+            )
+            if entity is None:
+                raise ServiceValidationError(f"Unknown Windhager climate {entity_id}")
+            if (other := functions.get(entity.oids)) is not None:
+                raise ServiceValidationError(
+                    f"{entity_id} is targeted more than once"
+                    if other == entity_id
+                    else f"{entity_id} and {other} control the same climate"
+                )
+            functions[entity.oids] = entity_id
+            settings = {k: v for k, v in target.items() if k != "entity_id"}
+            targets.append((entity, entity.writes_for(**settings)))
+
+        # The client's scheduler caps the writes in flight, the writes of a
+        # single climate stay in order
+        results = await asyncio.gather(
+            *(entity.async_write(writes) for entity, writes in targets)
+        )
+
+        # One read back per node, instead of a refresh per climate
+        by_coordinator: dict = {}
+        for (entity, _), entity_results in zip(targets, results):
+            node_results, oids = by_coordinator.setdefault(
+                entity.coordinator, ([], set())
+            )
+            node_results.extend(entity_results)
+            oids.update(entity.oids)
+        errors = [
+            str(err)
+            for err in await asyncio.gather(
+                *(
+                    coordinator.async_apply_writes(node_results, tuple(oids))
+                    for coordinator, (node_results, oids) in by_coordinator.items()
+                ),
+                return_exceptions=True,
+            )
+            if err is not None
+        ]
+
+        if errors:
+            raise HomeAssistantError("; ".join(errors))
+        if not call.return_response:
+            return None
+        return {
+            entity.entity_id: [
+                {"oid": r.oid, "value": r.value, "attempts": r.attempts}
+                for r in entity_results
+            ]
+            for (entity, _), entity_results in zip(targets, results)
+        }
+
+    async def set_tracing(call: ServiceCall) -> None:
+        """Switch the request and cycle tracing on or off."""
+        for gateway in _get_gateways(hass, call):
+            gateway.client.tracer.enable(call.data["enabled"])
+            _LOGGER.info(
+                "Tracing %s for %s",
+                "enabled" if call.data["enabled"] else "disabled",
+                gateway.client.host,
+            )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DUMP_OIDS,
+        dump_oids,
+        schema=DUMP_OIDS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_CLIMATES,
+        set_climates,
+        schema=SET_CLIMATES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_TRACING, set_tracing, schema=SET_TRACING_SCHEMA
+    )
+
+
+def _write_json(path: str, data: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2, ensure_ascii=False)
@@ -0,0 +1,119 @@
+"""Request and cycle tracing of the Windhager client."""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any
+
+from .const import TRACE_BUFFER_SIZE
+
+
+class Trace:
+    """Durations of the phases of a request or cycle, as they complete."""
+
+    __slots__ = ("kind", "name", "spans", "fields", "_time", "_start", "_last")
+
+    def __init__(self, kind: str, name: str) -> None:
+        self.kind = kind
+        self.name = name
+        self.spans: dict[str, float] = {}
+        self.fields: dict[str, Any] = {}
+        self._time = time.time()
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, span: str) -> None:
+        """Add the time since the previous mark to a phase."""
+        now = time.perf_counter()
+        self.spans[span] = self.spans.get(span, 0.0) + now - self._last
+        self._last = now
+
+    def set(self, **fields: Any) -> None:
+        """Attach details (status, error...) to the trace."""
+        self.fields.update(fields)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the trace, durations in ms."""
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "time": self._time,
+            **{span: round(value * 1000, 3) for span, value in self.spans.items()},
+            "total": round((self._last - self._start) * 1000, 3),
+            **self.fields,
+        }
+
+
+class _NoTrace:
+    """Trace of a request or cycle while tracing is off, recording nothing."""
+
+    __slots__ = ()
+
+    def mark(self, span: str) -> None:
+        pass
+
+    def set(self, **fields: Any) -> None:
+        pass
+
+
+NO_TRACE = _NoTrace()
+
+
+class Tracer:
+    """Ring of the latest request and cycle traces, filled while enabled.
+
+    Requests are split into waiting for a slot of the scheduler (`queue`),
+    building the digest headers (`auth`), the round trips including the
+    digest challenge (`network`) and decoding the JSON (`decode`). Cycles
+    are split into reading the OIDs (`read`) and turning the values into a
+    snapshot (`parse`).
+    """
+
+    __slots__ = ("enabled", "traces")
+
+    def __init__(self, size: int = TRACE_BUFFER_SIZE) -> None:
+        self.enabled = False
+        self.traces: deque[dict[str, Any]] = deque(maxlen=size)
+
+    def enable(self, enabled: bool) -> None:
+        """Switch tracing on (with an empty ring) or off (keeping the ring)."""
+        if enabled and not self.enabled:
+            self.traces.clear()
+        self.enabled = enabled
+
+    def start(self, kind: str, name: str) -> Trace | _NoTrace:
+        """Start a trace, a no-op one while tracing is off."""
+        return Trace(kind, name) if self.enabled else NO_TRACE
+
+    def end(self, trace: Trace | _NoTrace) -> None:
+        """Add a finished trace to the ring."""
+        if isinstance(trace, Trace):
+            self.traces.append(trace.as_dict())
+
+    def summary(self) -> dict[str, dict[str, dict[str, float]]]:
+        """Return the count, mean and max duration of each phase, by kind."""
+        durations: dict[str, dict[str, list[float]]] = {}
+        for trace in self.traces:
+            spans = durations.setdefault(trace["kind"], {})
+            for key, value in trace.items():
+                if key != "time" and isinstance(value, float):
+                    spans.setdefault(key, []).append(value)
+        return {
+            kind: {
+                span: {
+                    "count": len(values),
+                    "mean": round(sum(values) / len(values), 3),
+                    "max": max(values),
+                }
+                for span, values in spans.items()
+            }
+            for kind, spans in durations.items()
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the tracer, for the diagnostics."""
+        return {
+            "enabled": self.enabled,
+            "summary": self.summary(),
+            "traces": list(self.traces),
+        }
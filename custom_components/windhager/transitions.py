@@ -0,0 +1,67 @@
+"""Heater status transition tracking."""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Any, Optional
+
+from .const import BURNER_ON_STATES, TRANSIENT_STATES
+
+
+class HeaterStatusTracker:
+    """Follow the heater status OID and detect state transitions."""
+
+    __slots__ = ("oid", "device_id", "state", "since", "cycles_today", "_day")
+
+    def __init__(self, oid: str, device_id: str) -> None:
+        self.oid = oid
+        self.device_id = device_id
+        self.state: Optional[int] = None
+        self.since: Optional[datetime] = None
+        self.cycles_today = 0
+        self._day = None
+
+    @property
+    def transient(self) -> bool:
+        """Return True while the heater is in a short-lived phase."""
+        return self.state in TRANSIENT_STATES
+
+    def restore(self, cycles: int, day: date) -> None:
+        """Add the burner starts of the day counted before a restart."""
+        if self._day is None:
+            self._day = day
+        if day == self._day:
+            self.cycles_today += cycles
+
+    def update(self, value: Any, now: datetime) -> Optional[dict[str, Any]]:
+        """Feed a new status value, return the event data on transition."""
+        if now.date() != self._day:
+            self._day = now.date()
+            self.cycles_today = 0
+
+        try:
+            state = int(value)
+        except (ValueError, TypeError):
+            return None
+
+        previous, since = self.state, self.since
+        if state == previous:
+            return None
+
+        self.state = state
+        self.since = now
+        if previous is None:
+            # First value after startup, nothing to compare with
+            return None
+
+        if state in BURNER_ON_STATES and previous not in BURNER_ON_STATES:
+            self.cycles_today += 1
+
+        return {
+            "device_id": self.device_id,
+            "oid": self.oid,
+            "from_state": previous,
+            "to_state": state,
+            "duration": (now - since).total_seconds(),
+            "cycles_today": self.cycles_today,
+        }